@@ -0,0 +1,187 @@
+#!/usr/bin/env python3
+"""
+End-to-end CLI benchmark, offline: serves a synthetic corpus from the local
+fixture server (fixture_server.py), subscribes a scratch HOME to it and runs
+`rss.py check`, `fetch` and `digest` as child processes. Reports throughput,
+per-feed latency percentiles, wall time and each command's peak RSS.
+Usage: python3 benchmarks/bench_cli.py [--commands check,fetch,digest] [--repeat N]
+       [--feeds N] [--items N] [--body-bytes N] [--latency MS] [--error-rate F]
+       [--cached] [--cli-args "..."] [--json PATH]
+"""
+
+import argparse
+import json
+import math
+import os
+import shlex
+import subprocess
+import sys
+import tempfile
+import time
+
+from fixture_server import add_corpus_args, start_server
+
+RSS = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'scripts', 'rss.py')
+
+
+def percentile(values, p):
+    """Nearest-rank percentile of a non-empty list"""
+    values = sorted(values)
+    return values[max(0, math.ceil(p / 100 * len(values)) - 1)]
+
+
+def run_cli(home, argv):
+    """Run rss.py under HOME; returns (seconds, peak RSS in MB, exit code, JSON records)"""
+    env = dict(os.environ, HOME=home)
+    start = time.perf_counter()
+    proc = subprocess.Popen([sys.executable, RSS, *argv], stdout=subprocess.PIPE,
+                            stderr=subprocess.DEVNULL, env=env)
+    out = proc.stdout.read()
+    proc.stdout.close()
+    # wait4() rather than wait(): it hands back this child's own resource usage
+    _, status, usage = os.wait4(proc.pid, 0)
+    seconds = time.perf_counter() - start
+    proc.returncode = os.waitstatus_to_exitcode(status)
+    try:
+        records = json.loads(out)
+    except ValueError:
+        records = []
+    # ru_maxrss is in kilobytes on Linux and bytes on macOS
+    peak = usage.ru_maxrss / (1024 * 1024 if sys.platform == 'darwin' else 1024)
+    return seconds, peak, proc.returncode, records
+
+
+def profile_latencies(records):
+    """Per-feed milliseconds from a --profile record, not counting time queued behind limits"""
+    for record in records:
+        if record.get('type') == 'profile':
+            return [sum(s for stage, s in feed['seconds'].items() if stage != 'wait') * 1000
+                    for feed in record['feeds'].values()], record
+    return [], None
+
+
+def bench_check(home, args, common):
+    seconds, peak, code, records = run_cli(home, ['check'] + common)
+    checks = [r for r in records if r.get('type') == 'check']
+    return {'seconds': seconds, 'peak_mb': peak, 'exit': code, 'feeds': len(checks), 'items': None,
+            'errors': sum(1 for r in checks if r['status'] != 'ok'),
+            'latencies': [r['timings']['total'] for r in checks if r.get('timings')]}
+
+
+def bench_digest(home, args, common):
+    seconds, peak, code, records = run_cli(home, ['digest', '-d', str(args.days), '--profile'] + common)
+    latencies, profile = profile_latencies(records)
+    return {'seconds': seconds, 'peak_mb': peak, 'exit': code, 'feeds': len(latencies),
+            'items': profile['items'] if profile else 0,
+            'errors': sum(profile['errors'].values()) if profile else 0, 'latencies': latencies}
+
+
+def bench_fetch(home, args, common, feeds):
+    """One `fetch` process per sampled feed; its latency is the whole process"""
+    step = max(1, len(feeds) // args.fetch_samples)
+    result = {'seconds': 0.0, 'peak_mb': 0.0, 'exit': 0, 'feeds': 0, 'items': 0, 'errors': 0, 'latencies': []}
+    for feed in feeds[::step][:args.fetch_samples]:
+        seconds, peak, code, records = run_cli(home, ['fetch', feed['xmlUrl'], '-n', '10', '--profile'] + common)
+        _, profile = profile_latencies(records)
+        result['seconds'] += seconds
+        result['peak_mb'] = max(result['peak_mb'], peak)
+        result['exit'] = result['exit'] or code
+        result['feeds'] += 1
+        result['items'] += profile['items'] if profile else 0
+        result['errors'] += 1 if code or any(r.get('type') == 'error' for r in records) else 0
+        result['latencies'].append(seconds * 1000)
+    return result
+
+
+def summarize(command, runs):
+    latencies = [ms for run in runs for ms in run['latencies']]
+    seconds = sum(run['seconds'] for run in runs)
+    feeds = sum(run['feeds'] for run in runs)
+    items = None if runs[0]['items'] is None else sum(run['items'] for run in runs)
+    walls = [run['seconds'] for run in runs]
+    return {
+        'command': command,
+        'runs': len(runs),
+        'wall_p50': round(percentile(walls, 50), 3),
+        'wall_max': round(max(walls), 3),
+        'feeds_per_s': round(feeds / seconds, 1) if seconds else None,
+        'items_per_s': round(items / seconds, 1) if items is not None and seconds else None,
+        'latency_ms': {f"p{p}": round(percentile(latencies, p), 1) for p in (50, 90, 99)} if latencies else None,
+        'peak_rss_mb': round(max(run['peak_mb'] for run in runs), 1),
+        'errors': sum(run['errors'] for run in runs),
+        'failed_runs': sum(1 for run in runs if run['exit']),
+    }
+
+
+def print_table(results):
+    print(f"{'command':<9}{'runs':>5}{'wall p50':>10}{'feeds/s':>9}{'items/s':>10}"
+          f"{'lat p50':>9}{'p90':>8}{'p99':>8}{'peak MB':>9}{'errors':>8}")
+    for r in results:
+        lat = r['latency_ms'] or {}
+        fmt = lambda value, width, spec: f"{'-' if value is None else format(value, spec):>{width}}"
+        print(f"{r['command']:<9}{r['runs']:>5}{r['wall_p50']:>9.2f}s{fmt(r['feeds_per_s'], 9, ',.1f')}"
+              f"{fmt(r['items_per_s'], 10, ',.0f')}{fmt(lat.get('p50'), 9, '.0f')}{fmt(lat.get('p90'), 8, '.0f')}"
+              f"{fmt(lat.get('p99'), 8, '.0f')}{r['peak_rss_mb']:>9.1f}{r['errors']:>8,}")
+    print("(latency in ms: per feed for check and digest, per process for fetch)")
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Offline check/fetch/digest benchmark against a local fixture server')
+    add_corpus_args(parser)
+    parser.add_argument('--commands', default='check,fetch,digest', help='Commands to run (default check,fetch,digest)')
+    parser.add_argument('--repeat', type=int, default=3, help='Runs of each command (default 3)')
+    parser.add_argument('--days', type=int, default=7, help='digest -d (default 7)')
+    parser.add_argument('--fetch-samples', type=int, default=10, help='Feeds fetched per fetch run (default 10)')
+    parser.add_argument('--cached', action='store_true',
+                        help='Keep ETag/Last-Modified between runs (after one warm-up run) instead of --no-cache')
+    parser.add_argument('--cli-args', default='', help='Extra options for check and digest, e.g. "--concurrency 100"')
+    parser.add_argument('--json', metavar='PATH', help='Also write the results as JSON, to compare runs')
+    args = parser.parse_args()
+
+    server = start_server(args)
+    corpus = server.corpus
+    print(f"📚 {len(corpus.feeds):,} feeds × {args.items:,} items × {args.body_bytes:,} B bodies "
+          f"({corpus.size / 1024 / 1024:.1f} MB, {args.formats}) on {min(corpus.hosts, len(corpus.feeds)):,} hosts; "
+          f"latency {args.latency:g}±{args.jitter:g} ms, errors {args.error_rate:.0%}, 429s {args.throttle_rate:.0%}")
+
+    results = []
+    with tempfile.TemporaryDirectory(prefix='rss-bench-') as home:
+        config = os.path.join(home, '.openclaw', 'workspace')
+        os.makedirs(config)
+        feeds = corpus.subscriptions(server.port)
+        with open(os.path.join(config, 'rss_feeds.json'), 'w', encoding='utf-8') as f:
+            json.dump(feeds, f)
+
+        common = ['--format', 'json'] + ([] if args.cached else ['--no-cache'])
+        extra = shlex.split(args.cli_args)
+        benches = {'check': lambda: bench_check(home, args, common + extra),
+                   'fetch': lambda: bench_fetch(home, args, common, feeds),
+                   'digest': lambda: bench_digest(home, args, common + extra)}
+        for command in args.commands.split(','):
+            if args.cached:
+                benches[command]()
+            runs = []
+            for _ in range(args.repeat):
+                runs.append(benches[command]())
+                print(f"  {command}: {runs[-1]['seconds']:.2f} s", file=sys.stderr)
+            results.append(summarize(command, runs))
+
+    print()
+    print_table(results)
+    stats = server.stats
+    print(f"🌐 Server: {stats['requests']:,} requests, {stats['200']:,} full, {stats['206']:,} ranged, "
+          f"{stats['304']:,} not modified, {stats['500']:,} errors, {stats['429']:,} throttled, "
+          f"{stats['bytes'] / 1024 / 1024:.1f} MB sent")
+    server.shutdown()
+
+    if args.json:
+        with open(args.json, 'w', encoding='utf-8') as f:
+            json.dump({'corpus': {key: getattr(args, key) for key in (
+                'feeds', 'items', 'body_bytes', 'formats', 'hosts', 'latency', 'jitter', 'error_rate',
+                'throttle_rate', 'seed')}, 'cached': args.cached, 'cli_args': args.cli_args,
+                'results': results, 'server': dict(stats)}, f, indent=2)
+            f.write('\n')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,102 @@
+#!/usr/bin/env python3
+"""
+Dedup scaling benchmark: time per item of dedup.Deduper at growing window
+sizes (it should stay flat, as there is no pairwise comparison), how many
+planted near-duplicates it finds and how many different stories it merges
+(release and weekly series whose titles differ only in their numbers).
+Usage: python3 benchmarks/bench_dedup.py [--sizes N,N,...] [--dup-rate F]
+"""
+
+import argparse
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'scripts'))
+
+from dedup import Deduper  # noqa: E402
+
+# Series of look-alike titles planted per run, spread over it; a fixed number,
+# as thousands of template titles would share LSH buckets and skew the timing
+SERIES = 100
+
+
+def letters(i):
+    """A made-up word with no digits in it, as numbers in titles must match exactly"""
+    word = ''
+    while True:
+        i, rest = divmod(i, 26)
+        word += chr(ord('a') + rest)
+        if not i:
+            return word
+
+
+def series_items(i):
+    """Titles that look alike but are different stories, from one feed and from two"""
+    name = f"{letters(100000 + 2 * i)} {letters(100001 + 2 * i)}"
+    major, minor, week = i % 7 + 1, i % 13, i % 52 + 1
+    feed = {'feed_name': f"Series {i}", 'feed_url': f"https://series{i}.example/rss"}
+    other = {'feed_name': f"Mirror {i}", 'feed_url': f"https://mirror{i}.example/rss"}
+    titles = [
+        (f"{name} {major}.{minor}.1 released", feed), (f"{name} {major}.{minor}.2 released", feed),
+        (f"Release v{major}.{minor}.0 of {name} client", feed),
+        (f"Release v{major}.{minor + 1}.0 of {name} client", other),
+        (f"Weekly update {week} for project {name}", feed),
+        (f"Weekly update {week + 1} for project {name}", feed),
+        # The same title again from the same feed is a new post, not a repeat
+        (f"Monthly roundup from the {name} team", feed), (f"Monthly roundup from the {name} team", feed),
+    ]
+    return [{'id': f"s{i}-{n}", 'title': title, 'link': f"https://series{i}.example/posts/{n}", **source}
+            for n, (title, source) in enumerate(titles)]
+
+
+def make_items(n, dup_rate, seed=1):
+    """n stories; a dup_rate share is repeated by an aggregator, reworded or re-linked,
+    and SERIES of them come with a series of look-alike titles"""
+    rng = random.Random(seed)
+    vocab = [letters(i) for i in range(50000)]
+    items, planted = [], 0
+    for i in range(n):
+        words = rng.choices(vocab, k=rng.randint(5, 12))
+        link = f"https://site{i % 500}.example/posts/{i}"
+        items.append({'id': str(i), 'title': ' '.join(words), 'link': link,
+                      'feed_name': f"Feed {i % 2000}", 'feed_url': f"https://feed{i % 2000}.example/rss"})
+        if rng.random() < dup_rate:
+            planted += 1
+            if rng.random() < 0.5:
+                # Same article through a tracking link
+                dup_title, dup_link = ' '.join(words), f"http://www.{link[8:]}/?utm_source=agg"
+            else:
+                # Aggregator title with one word changed, linking to its comments page
+                reworded = list(words)
+                reworded[rng.randrange(len(reworded))] = 'changed'
+                dup_title, dup_link = ' '.join(reworded), f"https://agg.example/item?id={i}"
+            items.append({'id': f"{i}-dup", 'title': dup_title, 'link': dup_link,
+                          'feed_name': 'Aggregator', 'feed_url': 'https://agg.example/rss'})
+        if i % max(1, n // SERIES) == 0:
+            items.extend(series_items(i))
+    return items, planted
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Digest dedup scaling benchmark')
+    parser.add_argument('--sizes', default='10000,50000,200000', help='Stories per run (default 10000,50000,200000)')
+    parser.add_argument('--dup-rate', type=float, default=0.25, help='Share of stories repeated (default 0.25)')
+    args = parser.parse_args()
+
+    print(f"{'stories':>10}{'items':>10}{'seconds':>10}{'µs/item':>10}{'planted':>10}{'merged':>10}{'false':>8}")
+    for size in (int(s) for s in args.sizes.split(',')):
+        items, planted = make_items(size, args.dup_rate)
+        deduper = Deduper()
+        start = time.perf_counter()
+        merged = [(item['id'], deduper.add(item)) for item in items]
+        elapsed = time.perf_counter() - start
+        merged = [(dup, first) for dup, first in merged if first is not None]
+        false = sum(1 for dup, first in merged if dup != f"{first}-dup")
+        print(f"{size:>10,}{len(items):>10,}{elapsed:>10.2f}{elapsed / len(items) * 1e6:>10.1f}"
+              f"{planted:>10,}{len(merged):>10,}{false:>8,}")
+
+
+if __name__ == '__main__':
+    main()
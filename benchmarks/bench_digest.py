@@ -0,0 +1,107 @@
+#!/usr/bin/env python3
+"""
+Digest aggregation benchmark: peak memory and time of topk.CategoryTopK
+against the collect-sort-group approach the digest used before, over a
+synthetic stream of per-feed item lists.
+Usage: python3 benchmarks/bench_digest.py [--feeds N] [--items N] [--categories N] [--limit N]
+"""
+
+import argparse
+import os
+import random
+import sys
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'scripts'))
+
+from topk import CategoryTopK  # noqa: E402
+
+NOW = 1_750_000_000
+
+
+def feed_results(feeds, items, categories, seed=1):
+    """Yield one item list per feed, the way FetchEngine.run hands them back"""
+    rng = random.Random(seed)
+    for f in range(feeds):
+        category = f"Category {f % categories}"
+        yield [{
+            'id': f"{f}-{i}",
+            'title': f"Item {i} of feed {f}",
+            'link': f"https://example.com/{f}/{i}",
+            'date': None if rng.random() < 0.01 else NOW - rng.randrange(30 * 86400),
+            'feed_name': f"Feed {f}",
+            'feed_url': f"https://example.com/{f}/feed.xml",
+            'category': category,
+        } for i in range(items)]
+
+
+def newest(item):
+    return NOW if item['date'] is None else item['date']
+
+
+def legacy(results, limit):
+    """Extend one list with everything, sort it, group it, then slice [:limit]"""
+    all_updates = []
+    for items in results:
+        all_updates.extend(items)
+    all_updates.sort(key=newest, reverse=True)
+    by_category = {}
+    for item in all_updates:
+        by_category.setdefault(item['category'] or 'Uncategorized', []).append(item)
+    return [(cat, len(by_category[cat]), by_category[cat][:limit]) for cat in sorted(by_category)]
+
+
+def topk(results, limit):
+    top = CategoryTopK(limit, key=newest)
+    for items in results:
+        for item in items:
+            top.add(item)
+    return list(top.categories())
+
+
+def measure(fn, args):
+    """(seconds, peak MB, shown) over fresh result streams.
+
+    Time and memory come from separate runs because tracemalloc slows every
+    allocation; both include generating the synthetic items, which costs
+    the same for each approach.
+    """
+    start = time.perf_counter()
+    fn(feed_results(args.feeds, args.items, args.categories), args.limit)
+    elapsed = time.perf_counter() - start
+
+    tracemalloc.start()
+    shown = fn(feed_results(args.feeds, args.items, args.categories), args.limit)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return elapsed, peak / 1024 / 1024, shown
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Digest top-K aggregation benchmark')
+    parser.add_argument('--feeds', type=int, default=2000, help='Feeds (default 2000)')
+    parser.add_argument('--items', type=int, default=100, help='In-window items per feed (default 100)')
+    parser.add_argument('--categories', type=int, default=20, help='Categories (default 20)')
+    parser.add_argument('-n', '--limit', type=int, default=3, help='Items shown per category (default 3)')
+    args = parser.parse_args()
+
+    total = args.feeds * args.items
+    print(f"📊 {total:,} items from {args.feeds} feeds in {args.categories} categories, top {args.limit}\n")
+    print(f"{'approach':<16}{'time s':>10}{'peak MB':>12}")
+    results = {}
+    for name, fn in (('collect+sort', legacy), ('top-K heap', topk)):
+        elapsed, peak, shown = measure(fn, args)
+        results[name] = shown
+        print(f"{name:<16}{elapsed:>10.2f}{peak:>12.1f}")
+
+    same = all(
+        cat_a == cat_b and count_a == count_b and [i['id'] for i in a] == [i['id'] for i in b]
+        for (cat_a, count_a, a), (cat_b, count_b, b) in zip(results['collect+sort'], results['top-K heap']))
+    print(f"\n{'✅ Same items shown' if same else '❌ Outputs differ'}")
+    if not same:
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,109 @@
+#!/usr/bin/env python3
+"""
+Parser micro-benchmark: items/second of feedparse.iter_items against the
+ElementTree findtext() loop the CLI used before, for a full parse and for
+reading only the first --limit items (where streaming can stop early).
+Usage: python3 benchmarks/bench_parse.py [--items N] [--limit N] [--repeat N]
+"""
+
+import argparse
+import os
+import sys
+import time
+import xml.etree.ElementTree as ET
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'scripts'))
+
+from itertools import islice  # noqa: E402
+
+from feedparse import iter_items, ATOM_NS, CONTENT_NS  # noqa: E402
+
+
+def make_rss(n):
+    items = ''.join(
+        f"<item><title>Item {i}</title><link>https://example.com/{i}</link>"
+        f"<guid>https://example.com/{i}</guid><pubDate>Mon, 06 Jan 2025 10:00:00 +0000</pubDate>"
+        f"<description>Summary of item {i} {'lorem ipsum ' * 20}</description>"
+        f"<content:encoded><![CDATA[<p>{'body text ' * 80}</p>]]></content:encoded></item>"
+        for i in range(n))
+    return (f'<?xml version="1.0"?><rss version="2.0" xmlns:content="{CONTENT_NS[1:-1]}">'
+            f'<channel><title>Bench</title>{items}</channel></rss>').encode('utf-8')
+
+
+def make_atom(n):
+    entries = ''.join(
+        f'<entry><title>Entry {i}</title><link rel="alternate" href="https://example.com/{i}"/>'
+        f'<id>urn:bench:{i}</id><updated>2025-01-06T10:00:00+02:00</updated>'
+        f"<summary>Summary of entry {i} {'lorem ipsum ' * 20}</summary>"
+        f"<content type=\"html\">{'body text ' * 80}</content></entry>"
+        for i in range(n))
+    return (f'<?xml version="1.0"?><feed xmlns="{ATOM_NS[1:-1]}"><title>Bench</title>'
+            f'{entries}</feed>').encode('utf-8')
+
+
+def legacy_parse(data):
+    """The findtext() loop previously duplicated in cmd_fetch and cmd_digest"""
+    root = ET.fromstring(data)
+    items = []
+    channel = root.find('channel')
+    if channel is not None:
+        for item in channel.findall('item'):
+            desc = item.findtext('description', '')
+            items.append({
+                "title": item.findtext('title', 'No Title'),
+                "link": item.findtext('link', ''),
+                "date": item.findtext('pubDate', ''),
+                "summary": desc[:300] + "..." if len(desc) > 300 else desc,
+                "content": item.findtext(f'{CONTENT_NS}encoded'),
+            })
+    else:
+        for entry in root.findall(f'{ATOM_NS}entry'):
+            link_node = entry.find(f'{ATOM_NS}link')
+            summary = entry.findtext(f'{ATOM_NS}summary', '')
+            items.append({
+                "title": entry.findtext(f'{ATOM_NS}title', 'No Title'),
+                "link": link_node.get('href') if link_node is not None else '',
+                "date": entry.findtext(f'{ATOM_NS}updated', ''),
+                "summary": summary[:300] + "..." if len(summary) > 300 else summary,
+                "content": entry.findtext(f'{ATOM_NS}content'),
+            })
+    return items
+
+
+def unified_parse(data, limit=None, chunk_size=16384):
+    chunks = (data[i:i + chunk_size] for i in range(0, len(data), chunk_size))
+    return list(islice(iter_items(chunks), limit))
+
+
+def bench(fn, data, repeat):
+    """Best-of-N wall time in seconds"""
+    best = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn(data)
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Feed parser micro-benchmark')
+    parser.add_argument('--items', type=int, default=2000, help='Items per document (default 2000)')
+    parser.add_argument('--limit', type=int, default=5, help='Items wanted in the early-stop case (default 5)')
+    parser.add_argument('--repeat', type=int, default=5, help='Runs per case, best is reported (default 5)')
+    args = parser.parse_args()
+
+    print(f"{'format':<8}{'legacy items/s':>16}{'unified items/s':>17}{'ratio':>8}"
+          f"{'legacy top-N ms':>17}{'unified top-N ms':>18}")
+    for name, make in (('rss', make_rss), ('atom', make_atom)):
+        data = make(args.items)
+        legacy = args.items / bench(legacy_parse, data, args.repeat)
+        unified = args.items / bench(unified_parse, data, args.repeat)
+        # The old code always parsed the whole document before slicing [:limit]
+        legacy_top = bench(legacy_parse, data, args.repeat) * 1000
+        unified_top = bench(lambda d: unified_parse(d, args.limit), data, args.repeat) * 1000
+        print(f"{name:<8}{legacy:>16,.0f}{unified:>17,.0f}{unified / legacy:>7.2f}x"
+              f"{legacy_top:>17.2f}{unified_top:>18.2f}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,93 @@
+#!/usr/bin/env python3
+"""
+CLI startup benchmark: wall time of short rss.py commands run directly, through
+a warm `rss serve` via RSS_AGENT_SOCKET, and as a bare socket request with no
+client interpreter at all, against a bare `python3 -c pass` for reference.
+Usage: python3 benchmarks/bench_startup.py [--runs N] [--feeds N]
+"""
+
+import argparse
+import json
+import os
+import socket
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+RSS = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'scripts', 'rss.py')
+
+COMMANDS = (['--help'], ['list'], ['list', '--format', 'json'], ['search', 'feed'], ['digest', '--help'])
+
+
+def timed_runs(fn, runs):
+    """(median, p90) milliseconds of `runs` calls, after one warm-up"""
+    fn()
+    times = []
+    for _ in range(runs):
+        start = time.perf_counter()
+        fn()
+        times.append((time.perf_counter() - start) * 1000)
+    times.sort()
+    return statistics.median(times), times[int(len(times) * 0.9) - 1]
+
+
+def spawn(argv, env):
+    return lambda: subprocess.run(argv, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL, check=False)
+
+
+def raw_request(path, argv):
+    """What a socat/nc client does: one JSON line, output and exit status read back from the socket"""
+    def request():
+        with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as sock:
+            sock.connect(path)
+            sock.sendall(json.dumps({'argv': argv}).encode('utf-8') + b'\n')
+            while sock.recv(65536):
+                pass
+    return request
+
+
+def main():
+    parser = argparse.ArgumentParser(description='rss.py startup time, direct and through rss serve')
+    parser.add_argument('--runs', type=int, default=20, help='Timed runs per command (default 20)')
+    parser.add_argument('--feeds', type=int, default=200, help='Subscriptions in the scratch config (default 200)')
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory(prefix='rss-startup-') as home:
+        config = os.path.join(home, '.openclaw', 'workspace')
+        os.makedirs(config)
+        with open(os.path.join(config, 'rss_feeds.json'), 'w', encoding='utf-8') as f:
+            json.dump([{'name': f"Feed {i}", 'xmlUrl': f"https://feed{i}.example/rss",
+                        'category': f"Category {i % 8}"} for i in range(args.feeds)], f)
+        env = dict(os.environ, HOME=home)
+        env.pop('RSS_AGENT_SOCKET', None)
+
+        path = os.path.join(home, 'rss.sock')
+        server = subprocess.Popen([sys.executable, RSS, 'serve', '--socket', path], env=env,
+                                  stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+        try:
+            while not os.path.exists(path):
+                if server.poll() is not None:
+                    sys.exit("❌ rss serve did not start")
+                time.sleep(0.05)
+            served = dict(env, RSS_AGENT_SOCKET=path)
+
+            if os.environ.get('PYTHONDONTWRITEBYTECODE'):
+                print("⚠️ PYTHONDONTWRITEBYTECODE is set: every module is compiled on each start\n")
+            base, _ = timed_runs(spawn([sys.executable, '-c', 'pass'], env), args.runs)
+            print(f"python3 -c pass: {base:.1f} ms (interpreter startup, included in the first two columns)\n")
+            print(f"{'command':<24}{'direct':>14}{'rss serve':>14}{'raw socket':>14}")
+            for argv in COMMANDS:
+                cells = [timed_runs(spawn([sys.executable, RSS] + argv, env), args.runs),
+                         timed_runs(spawn([sys.executable, RSS] + argv, served), args.runs),
+                         timed_runs(raw_request(path, argv), args.runs)]
+                print(f"{' '.join(argv):<24}" + ''.join(f"{f'{median:.1f} / {p90:.0f}':>14}" for median, p90 in cells))
+            print("\n(milliseconds, median / p90)")
+        finally:
+            server.terminate()
+            server.wait()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,269 @@
+#!/usr/bin/env python3
+"""
+Local feed fixture server: a synthetic RSS/Atom/RDF corpus served over HTTP
+with tunable latency and failure rates, so fetching can be measured without
+the network. Each feed gets its own loopback address (127.x.y.z) by default,
+so per-host limits apply the way they would to real feeds. Serves ETag /
+Last-Modified (304s) and byte ranges, like the feed hosts check probes.
+Usage: python3 benchmarks/fixture_server.py [--feeds N] [--items N] [--body-bytes N]
+       [--latency MS] [--jitter MS] [--error-rate F] [--throttle-rate F] [--port N]
+"""
+
+import argparse
+import hashlib
+import random
+import sys
+import threading
+import time
+from collections import Counter
+from datetime import datetime, timedelta, timezone
+from email.utils import format_datetime
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from xml.sax.saxutils import escape
+
+FORMATS = ('rss', 'atom', 'rdf')
+WORDS = ('feed', 'release', 'kernel', 'python', 'latency', 'cache', 'parser', 'storage', 'network',
+         'compiler', 'security', 'database', 'browser', 'protocol', 'memory', 'thread', 'update',
+         'design', 'format', 'benchmark', 'server', 'client', 'query', 'index', 'stream', 'graph')
+
+
+def feed_host(index, hosts):
+    """Loopback address of a feed; Linux answers on all of 127.0.0.0/8"""
+    n = index % hosts + 1
+    return f"127.{n >> 16 & 255}.{n >> 8 & 255}.{n & 255}"
+
+
+def make_feed(index, fmt, items, body_bytes, span_days, now, seed=1):
+    """One feed document as bytes; items are newest first, spread over span_days"""
+    rng = random.Random(seed * 1_000_003 + index)
+    base = f"https://site{index}.example"
+    step = timedelta(days=span_days) / max(items, 1)
+    entries = []
+    for i in range(items):
+        title = f"{' '.join(rng.choices(WORDS, k=rng.randint(4, 9))).capitalize()} #{index}-{i}"
+        link = f"{base}/posts/{i}"
+        date = now - step * (i + rng.random())
+        paragraph = ' '.join(rng.choices(WORDS, k=12)) + '. '
+        body = '<p>' + (paragraph * (body_bytes // len(paragraph) + 1))[:body_bytes] + '</p>'
+        summary = escape(paragraph * 2)
+        if fmt == 'atom':
+            entries.append(
+                f'<entry><title>{title}</title><link rel="alternate" href="{link}"/><id>{link}</id>'
+                f'<updated>{date.isoformat()}</updated><summary>{summary}</summary>'
+                f'<content type="html">{escape(body)}</content></entry>')
+        elif fmt == 'rdf':
+            entries.append(
+                f'<item rdf:about="{link}"><title>{title}</title><link>{link}</link>'
+                f'<dc:date>{date.isoformat()}</dc:date><description>{summary}</description>'
+                f'<content:encoded><![CDATA[{body}]]></content:encoded></item>')
+        else:
+            entries.append(
+                f'<item><title>{title}</title><link>{link}</link><guid>{link}</guid>'
+                f'<pubDate>{format_datetime(date)}</pubDate><description>{summary}</description>'
+                f'<content:encoded><![CDATA[{body}]]></content:encoded></item>')
+    entries = ''.join(entries)
+    content = 'xmlns:content="http://purl.org/rss/1.0/modules/content/"'
+    if fmt == 'atom':
+        doc = (f'<feed xmlns="http://www.w3.org/2005/Atom"><title>Fixture feed {index}</title>'
+               f'<link href="{base}/"/><id>{base}/</id>{entries}</feed>')
+    elif fmt == 'rdf':
+        doc = (f'<rdf:RDF xmlns:rdf="http://www.w3.org/1999/02/22-rdf-syntax-ns#" '
+               f'xmlns="http://purl.org/rss/1.0/" xmlns:dc="http://purl.org/dc/elements/1.1/" {content}>'
+               f'<channel rdf:about="{base}/"><title>Fixture feed {index}</title><link>{base}/</link>'
+               f'</channel>{entries}</rdf:RDF>')
+    else:
+        doc = (f'<rss version="2.0" {content}><channel><title>Fixture feed {index}</title>'
+               f'<link>{base}/</link>{entries}</channel></rss>')
+    return ('<?xml version="1.0" encoding="utf-8"?>' + doc).encode('utf-8')
+
+
+class Corpus:
+    """feeds × items × body_bytes of synthetic feeds, cycling through `formats`.
+
+    The same arguments (and seed) always produce the same documents, apart
+    from item dates, which are relative to when the corpus was built.
+    """
+
+    def __init__(self, feeds=100, items=50, body_bytes=2000, formats=FORMATS, hosts=None,
+                 span_days=14, seed=1):
+        self.hosts = hosts or feeds
+        now = datetime.now(timezone.utc)
+        self.last_modified = format_datetime(now, usegmt=True)
+        self.feeds = []
+        self.documents = {}
+        for index in range(feeds):
+            fmt = formats[index % len(formats)]
+            path = f"/feeds/{index}.{'atom' if fmt == 'atom' else 'rdf' if fmt == 'rdf' else 'xml'}"
+            body = make_feed(index, fmt, items, body_bytes, span_days, now, seed)
+            etag = '"' + hashlib.blake2b(body, digest_size=8).hexdigest() + '"'
+            self.documents[path] = (body, etag, 'application/atom+xml' if fmt == 'atom'
+                                    else 'application/rdf+xml' if fmt == 'rdf' else 'application/rss+xml')
+            self.feeds.append({'index': index, 'format': fmt, 'path': path,
+                               'host': feed_host(index, self.hosts), 'bytes': len(body)})
+
+    @property
+    def size(self):
+        return sum(feed['bytes'] for feed in self.feeds)
+
+    def subscriptions(self, port):
+        """rss_feeds.json entries pointing at the server"""
+        return [{'name': f"Fixture {feed['index']} ({feed['format']})",
+                 'xmlUrl': f"http://{feed['host']}:{port}{feed['path']}",
+                 'htmlUrl': f"https://site{feed['index']}.example/",
+                 'category': f"Category {feed['index'] % 8}"} for feed in self.feeds]
+
+
+class FixtureServer(ThreadingHTTPServer):
+    """Serves a Corpus with latency before each response and injected failures.
+
+    Every request first sleeps latency ± jitter seconds; then an
+    error_rate share get a 500 and a throttle_rate share a 429 with
+    Retry-After. Counts of what was served are kept in `stats`.
+    """
+
+    daemon_threads = True
+    # The default backlog of 5 drops SYNs when fifty fetchers connect at once
+    request_queue_size = 1024
+
+    def __init__(self, corpus, port=0, host='', latency=0.0, jitter=0.0, error_rate=0.0,
+                 throttle_rate=0.0, seed=1):
+        super().__init__((host, port), FixtureHandler)
+        self.corpus = corpus
+        self.latency = latency
+        self.jitter = jitter
+        self.error_rate = error_rate
+        self.throttle_rate = throttle_rate
+        self.rng = random.Random(seed)
+        self.lock = threading.Lock()
+        self.stats = Counter()
+
+    @property
+    def port(self):
+        return self.server_address[1]
+
+    def start(self):
+        threading.Thread(target=self.serve_forever, daemon=True).start()
+        return self
+
+    def handle_error(self, request, client_address):
+        # Clients drop pooled keep-alive connections when they exit
+        if not isinstance(sys.exc_info()[1], ConnectionError):
+            super().handle_error(request, client_address)
+
+    def count(self, key, n=1):
+        with self.lock:
+            self.stats[key] += n
+
+    def draw(self):
+        """(delay, failure) for the next request"""
+        with self.lock:
+            delay = max(0.0, self.latency + self.rng.uniform(-self.jitter, self.jitter))
+            roll = self.rng.random()
+        if roll < self.error_rate:
+            return delay, 500
+        if roll < self.error_rate + self.throttle_rate:
+            return delay, 429
+        return delay, None
+
+
+class FixtureHandler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+
+    def do_GET(self):
+        server = self.server
+        server.count('requests')
+        delay, failure = server.draw()
+        if delay:
+            time.sleep(delay)
+        document = server.corpus.documents.get(self.path.split('?')[0])
+        if document is None:
+            return self.reply(404)
+        if failure is not None:
+            server.count(str(failure))
+            return self.reply(failure, headers={'Retry-After': '1'} if failure == 429 else None)
+        body, etag, content_type = document
+        headers = {'ETag': etag, 'Last-Modified': server.corpus.last_modified, 'Content-Type': content_type,
+                   'Accept-Ranges': 'bytes'}
+        if self.headers.get('If-None-Match') == etag:
+            server.count('304')
+            return self.reply(304, headers=headers)
+
+        status, ranged = 200, self.byte_range(len(body))
+        if ranged is not None:
+            start, end = ranged
+            status, body = 206, body[start:end + 1]
+            headers['Content-Range'] = f"bytes {start}-{end}/{len(document[0])}"
+        server.count(str(status))
+        server.count('bytes', len(body))
+        self.reply(status, body, headers)
+
+    def byte_range(self, size):
+        """(first, last) of a single `bytes=a-b` Range header, or None"""
+        value = self.headers.get('Range', '')
+        if not value.startswith('bytes=') or ',' in value:
+            return None
+        first, _, last = value[6:].partition('-')
+        if not first.isdigit() or int(first) >= size:
+            return None
+        return int(first), min(int(last) if last.isdigit() else size - 1, size - 1)
+
+    def reply(self, status, body=b'', headers=None):
+        self.send_response(status)
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        if status != 304:
+            self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+def add_corpus_args(parser):
+    parser.add_argument('--feeds', type=int, default=100, help='Feeds in the corpus (default 100)')
+    parser.add_argument('--items', type=int, default=50, help='Items per feed (default 50)')
+    parser.add_argument('--body-bytes', type=int, default=2000, help='Article body size per item (default 2000)')
+    parser.add_argument('--formats', default=','.join(FORMATS), help='Feed formats to cycle through (default rss,atom,rdf)')
+    parser.add_argument('--hosts', type=int, default=0, help='Loopback hosts to spread feeds over (default one per feed)')
+    parser.add_argument('--span-days', type=int, default=14, help='Days the items of a feed are spread over (default 14)')
+    parser.add_argument('--latency', type=float, default=20, help='Milliseconds before each response (default 20)')
+    parser.add_argument('--jitter', type=float, default=10, help='± random milliseconds added to the latency (default 10)')
+    parser.add_argument('--error-rate', type=float, default=0.0, help='Share of requests answered with a 500 (default 0)')
+    parser.add_argument('--throttle-rate', type=float, default=0.0, help='Share of requests answered with a 429 (default 0)')
+    parser.add_argument('--seed', type=int, default=1, help='Random seed (default 1)')
+
+
+def start_server(args, port=0):
+    """Build the corpus described by add_corpus_args() options and serve it"""
+    corpus = Corpus(args.feeds, args.items, args.body_bytes, tuple(args.formats.split(',')),
+                    args.hosts, args.span_days, args.seed)
+    return FixtureServer(corpus, port, latency=args.latency / 1000, jitter=args.jitter / 1000,
+                         error_rate=args.error_rate, throttle_rate=args.throttle_rate, seed=args.seed).start()
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Serve a synthetic feed corpus for benchmarks')
+    add_corpus_args(parser)
+    parser.add_argument('--port', type=int, default=8800, help='Port to listen on (default 8800)')
+    parser.add_argument('--opml', help='Also write the subscriptions as OPML, for `rss.py import`')
+    args = parser.parse_args()
+
+    server = start_server(args, args.port)
+    corpus = server.corpus
+    if args.opml:
+        outlines = ''.join(f'<outline type="rss" text="{escape(feed["name"])}" xmlUrl="{feed["xmlUrl"]}"/>'
+                           for feed in corpus.subscriptions(server.port))
+        with open(args.opml, 'w', encoding='utf-8') as f:
+            f.write(f'<?xml version="1.0"?><opml version="2.0"><body>{outlines}</body></opml>\n')
+    print(f"Serving {len(corpus.feeds)} feeds ({corpus.size / 1024 / 1024:.1f} MB) on port {server.port}, "
+          f"e.g. http://{corpus.feeds[0]['host']}:{server.port}{corpus.feeds[0]['path']}", file=sys.stderr)
+    try:
+        while True:
+            time.sleep(3600)
+    except KeyboardInterrupt:
+        print(f"\n{dict(server.stats)}", file=sys.stderr)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,118 @@
+#!/usr/bin/env python3
+"""
+Concurrency stress test for the subscription store: parallel add, remove and
+import processes against one rss_feeds.json, plus lock-free readers. Exits
+non-zero if any subscription is lost, resurrected, or a reader sees a
+partially written file.
+Usage: python3 benchmarks/stress_feeds.py [--workers N] [--ops N]
+"""
+
+import argparse
+import contextlib
+import io
+import multiprocessing
+import os
+import sys
+import tempfile
+import time
+from types import SimpleNamespace
+
+SCRIPTS = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'scripts')
+
+
+def load_cli(home):
+    """Import the CLI (cli.py, behind rss.py) with its config directory under a scratch HOME"""
+    os.environ['HOME'] = home
+    sys.path.insert(0, SCRIPTS)
+    import cli
+    return cli
+
+
+def quiet(fn, args):
+    with contextlib.redirect_stdout(io.StringIO()):
+        fn(args)
+
+
+def adder(home, worker, ops):
+    rss = load_cli(home)
+    for i in range(ops):
+        quiet(rss.cmd_add, SimpleNamespace(url=f"https://add.example/{worker}/{i}",
+                                           name=None, category='Add', html_url=None))
+
+
+def remover(home, worker, ops):
+    rss = load_cli(home)
+    for i in range(ops):
+        url = f"https://remove.example/{worker}/{i}"
+        quiet(rss.cmd_add, SimpleNamespace(url=url, name=None, category='Remove', html_url=None))
+        quiet(rss.cmd_remove, SimpleNamespace(identifier=url))
+
+
+def importer(home, worker, ops):
+    rss = load_cli(home)
+    outlines = ''.join(
+        f'<outline text="imp {worker}-{i}" xmlUrl="https://import.example/{worker}/{i}"/>'
+        for i in range(ops))
+    path = os.path.join(home, f"import-{worker}.opml")
+    with open(path, 'w', encoding='utf-8') as f:
+        f.write(f'<opml version="2.0"><body><outline text="Imported">{outlines}</outline></body></opml>')
+    # Import in small batches so imports interleave with the other writers
+    for _ in range(3):
+        quiet(rss.cmd_import, SimpleNamespace(file=path, validate=False))
+
+
+def reader(home, stop, errors):
+    rss = load_cli(home)
+    while not stop.is_set():
+        try:
+            rss.load_feeds()
+        except ValueError:
+            errors.value += 1
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Subscription store concurrency stress test')
+    parser.add_argument('--workers', type=int, default=4, help='Processes per role (default 4)')
+    parser.add_argument('--ops', type=int, default=50, help='Operations per process (default 50)')
+    args = parser.parse_args()
+
+    ctx = multiprocessing.get_context('spawn')
+    with tempfile.TemporaryDirectory() as home:
+        os.makedirs(os.path.join(home, '.openclaw', 'workspace'))
+        stop = ctx.Event()
+        errors = ctx.Value('i', 0)
+        readers = [ctx.Process(target=reader, args=(home, stop, errors)) for _ in range(2)]
+        writers = [ctx.Process(target=role, args=(home, w, args.ops))
+                   for role in (adder, remover, importer) for w in range(args.workers)]
+
+        start = time.perf_counter()
+        for p in readers + writers:
+            p.start()
+        for p in writers:
+            p.join()
+        stop.set()
+        for p in readers:
+            p.join()
+        elapsed = time.perf_counter() - start
+
+        rss = load_cli(home)
+        urls = [feed['xmlUrl'] for feed in rss.load_feeds()]
+        expected = {f"https://{kind}.example/{w}/{i}"
+                    for kind in ('add', 'import') for w in range(args.workers) for i in range(args.ops)}
+
+        missing = expected - set(urls)
+        leftover = [u for u in urls if u.startswith('https://remove.example/')]
+        duplicates = len(urls) - len(set(urls))
+        writes = args.workers * args.ops * 4 + args.workers * 3
+
+        print(f"⏱️ {writes} writes by {len(writers)} processes in {elapsed:.2f}s")
+        print(f"📊 {len(urls)} subscriptions, {len(missing)} lost, {len(leftover)} not removed, "
+              f"{duplicates} duplicated, {errors.value} torn reads")
+        if missing or leftover or duplicates or errors.value:
+            print("❌ FAILED")
+            sys.exit(1)
+        print("✅ OK")
+
+
+if __name__ == '__main__':
+    main()
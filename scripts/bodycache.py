@@ -0,0 +1,217 @@
+"""
+RSS Agent body cache - compressed, content-addressed copies of downloaded feeds
+"""
+
+import hashlib
+import json
+import mmap
+import os
+import tempfile
+import threading
+import time
+import zlib
+
+from locking import file_lock
+
+DEFAULT_MAX_BYTES = 64 * 1024 * 1024
+# Storing is on the download path; level 1 still shrinks feed XML several times over
+COMPRESS_LEVEL = 1
+# Reading a body back: compressed bytes fed to the inflater at a time, and
+# the most it hands the parser at once (feeds inflate 5-200x)
+READ_CHUNK = 64 * 1024
+PARSE_CHUNK = 64 * 1024
+# A reader that stopped early reads the rest of the body into the cache, up to this much
+DRAIN_BYTES = 1024 * 1024
+# zlib wbits for the gzip container, so objects are plain .gz files
+GZIP_WBITS = 16 + zlib.MAX_WBITS
+
+
+class BodyCache:
+    """The last complete body of each feed URL, gzip-compressed in a directory.
+
+    Bodies are stored by the SHA-1 of their content (objects/ab/abcd….gz),
+    so feeds serving the same document share one file and a changed
+    document is simply a new object. index.json maps each URL to its body
+    and download time, and each object to its size and last use; save()
+    merges it with what other processes wrote and evicts the least recently
+    used objects beyond max_bytes. Cached bodies are memory-mapped and
+    inflated chunk by chunk into the parser, so a cached feed is never
+    held in memory whole.
+    """
+
+    def __init__(self, directory, max_bytes=DEFAULT_MAX_BYTES):
+        self.directory = directory
+        self.index_path = os.path.join(directory, 'index.json')
+        self.max_bytes = max_bytes
+        self.lock = threading.Lock()
+        self.dirty = False
+        self.index = self._load()
+
+    def _load(self):
+        try:
+            with open(self.index_path, 'r', encoding='utf-8') as f:
+                index = json.load(f)
+            return {'urls': index['urls'], 'objects': index['objects']}
+        except (OSError, ValueError, KeyError, TypeError):
+            return {'urls': {}, 'objects': {}}
+
+    def _object_path(self, digest):
+        return os.path.join(self.directory, 'objects', digest[:2], f"{digest}.gz")
+
+    def age(self, url):
+        """Seconds since url's cached body was downloaded, or None if there is none"""
+        with self.lock:
+            entry = self.index['urls'].get(url)
+            if entry is None or entry['hash'] not in self.index['objects']:
+                return None
+            return max(0.0, time.time() - entry['stored'])
+
+    def locate(self, url):
+        """Path of url's cached body, counted as a use, or None if it is not cached"""
+        with self.lock:
+            entry = self.index['urls'].get(url)
+            obj = self.index['objects'].get(entry['hash']) if entry else None
+            if obj is None:
+                return None
+            obj['used'] = time.time()
+            self.dirty = True
+        return self._object_path(entry['hash'])
+
+    def digest(self, url):
+        """SHA-1 of url's cached body, or None if there is none"""
+        with self.lock:
+            entry = self.index['urls'].get(url)
+            if entry is None or entry['hash'] not in self.index['objects']:
+                return None
+            return entry['hash']
+
+    def open(self, url):
+        """url's cached body as a generator of chunks, or None if it is not cached"""
+        path = self.locate(url)
+        return None if path is None else read_object(path)
+
+    def store(self, url, chunks, on_stored=None):
+        """Pass a body through, keeping it as url's cached body if it is read to the end.
+
+        A consumer that stops early leaves the cache as it was; see drain().
+        Once the body is kept, on_stored(url, digest) is called with its SHA-1.
+        """
+        objects = os.path.join(self.directory, 'objects')
+        os.makedirs(objects, exist_ok=True)
+        fd, tmp = tempfile.mkstemp(dir=objects, suffix='.tmp')
+        sha1 = hashlib.sha1()
+        deflater = zlib.compressobj(COMPRESS_LEVEL, zlib.DEFLATED, GZIP_WBITS)
+        complete = False
+        try:
+            with os.fdopen(fd, 'wb') as f:
+                try:
+                    for chunk in chunks:
+                        sha1.update(chunk)
+                        f.write(deflater.compress(chunk))
+                        yield chunk
+                    f.write(deflater.flush())
+                    complete = True
+                finally:
+                    if not complete and hasattr(chunks, 'close'):
+                        chunks.close()
+            if complete:
+                self._add(url, sha1.hexdigest(), tmp)
+                if on_stored is not None:
+                    on_stored(url, sha1.hexdigest())
+        finally:
+            if os.path.exists(tmp):
+                os.unlink(tmp)
+
+    def _add(self, url, digest, tmp):
+        path = self._object_path(digest)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        size = os.path.getsize(tmp)
+        os.replace(tmp, path)
+        now = time.time()
+        with self.lock:
+            self.index['objects'][digest] = {'size': size, 'used': now}
+            self.index['urls'][url] = {'hash': digest, 'stored': now}
+            self.dirty = True
+
+    def save(self):
+        """Merge the index into the one on disk, evict down to max_bytes and write it back"""
+        if not self.dirty:
+            return
+        os.makedirs(self.directory, exist_ok=True)
+        with file_lock(self.index_path):
+            with self.lock:
+                disk = self._load()
+                for url, entry in self.index['urls'].items():
+                    if entry['stored'] >= disk['urls'].get(url, {}).get('stored', 0):
+                        disk['urls'][url] = entry
+                for digest, entry in self.index['objects'].items():
+                    known = disk['objects'].get(digest)
+                    if known is None and not os.path.exists(self._object_path(digest)):
+                        continue  # evicted by another process
+                    if known is None or entry['used'] >= known['used']:
+                        disk['objects'][digest] = entry
+                self._evict(disk)
+                tmp = f"{self.index_path}.{os.getpid()}.tmp"
+                with open(tmp, 'w', encoding='utf-8') as f:
+                    json.dump(disk, f)
+                os.replace(tmp, self.index_path)
+                self.index = disk
+                self.dirty = False
+
+    def _evict(self, index):
+        """Drop objects no URL points at any more, then the least recently used ones over the cap"""
+        live = {entry['hash'] for entry in index['urls'].values()}
+        objects = index['objects']
+        doomed = [digest for digest in objects if digest not in live]
+        total = sum(entry['size'] for digest, entry in objects.items() if digest in live)
+        for digest in sorted(live & objects.keys(), key=lambda digest: objects[digest]['used']):
+            if total <= self.max_bytes:
+                break
+            total -= objects[digest]['size']
+            doomed.append(digest)
+        if not doomed:
+            return
+        for digest in doomed:
+            del objects[digest]
+            try:
+                os.unlink(self._object_path(digest))
+            except FileNotFoundError:
+                pass
+        doomed = set(doomed)
+        index['urls'] = {url: entry for url, entry in index['urls'].items() if entry['hash'] not in doomed}
+
+
+def read_object(path):
+    """A cached body file (see BodyCache.locate) as a generator of chunks, or None if it is gone"""
+    try:
+        f = open(path, 'rb')
+    except FileNotFoundError:
+        # Evicted by another process since our index was read
+        return None
+    return _inflate(f)
+
+
+def _inflate(f):
+    """Decompressed chunks of an open .gz object, read through a memory map"""
+    with f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as data:
+        inflater = zlib.decompressobj(GZIP_WBITS)
+        with memoryview(data) as view:
+            for start in range(0, len(view), READ_CHUNK):
+                chunk = inflater.decompress(view[start:start + READ_CHUNK], PARSE_CHUNK)
+                while chunk:
+                    yield chunk
+                    chunk = inflater.decompress(inflater.unconsumed_tail, PARSE_CHUNK)
+        tail = inflater.flush()
+        if tail:
+            yield tail
+
+
+def drain(chunks, limit=DRAIN_BYTES):
+    """Read the rest of a body passing through BodyCache.store() so it gets cached.
+
+    Gives up after `limit` bytes, leaving a big feed's download cut short."""
+    read = 0
+    for chunk in chunks:
+        read += len(chunk)
+        if read > limit:
+            break
@@ -0,0 +1,1546 @@
+"""
+RSS Agent CLI - subcommands and argument parsing behind rss.py
+"""
+
+import argparse
+import os
+import sys
+from datetime import datetime
+
+# Config paths
+CONFIG_DIR = os.path.expanduser("~/.openclaw/workspace")
+FEEDS_FILE = os.path.join(CONFIG_DIR, "rss_feeds.json")
+HTTP_CACHE_FILE = os.path.join(CONFIG_DIR, "rss_http_cache.json")
+ITEMS_DB = os.path.join(CONFIG_DIR, "rss_items.db")
+SCHEDULE_FILE = os.path.join(CONFIG_DIR, "rss_schedule.json")
+BODY_CACHE_DIR = os.path.join(CONFIG_DIR, "rss_body_cache")
+SOCKET_FILE = os.path.join(CONFIG_DIR, "rss.sock")
+HEALTH_FILE = os.path.join(CONFIG_DIR, "rss_health.json")
+
+# Consecutive out-of-window items after which digest stops reading a feed
+OLD_ITEMS_BEFORE_STOP = 3
+
+def open_feeds():
+    """Load the indexed subscription store (read-only snapshot)"""
+    from subscriptions import FeedStore
+    return FeedStore(FEEDS_FILE)
+
+def update_feeds():
+    """Locked read-modify-write of the subscription store, saved on exit"""
+    from subscriptions import FeedStore
+    return FeedStore.update(FEEDS_FILE)
+
+def load_feeds():
+    """Load subscription list"""
+    return open_feeds().feeds()
+
+def open_http_cache(args, scope):
+    """Open the HTTP validator cache for a command, unless --no-cache"""
+    from fetcher import ValidatorCache
+    if getattr(args, 'no_cache', False):
+        return None
+    return ValidatorCache(HTTP_CACHE_FILE, scope=scope)
+
+def open_body_cache():
+    """Compressed copies of the last complete download of each feed"""
+    from bodycache import BodyCache
+    return BodyCache(BODY_CACHE_DIR)
+
+def open_health(args):
+    """Per-feed result history, with digest's --quarantine-after threshold"""
+    from health import FeedHealth, QUARANTINE_AFTER
+    return FeedHealth(HEALTH_FILE, getattr(args, 'quarantine_after', QUARANTINE_AFTER))
+
+def open_metrics(args, command):
+    """Metrics for this run, if --profile or --metrics asked for them"""
+    if not (getattr(args, 'profile', False) or getattr(args, 'metrics', None)
+            or getattr(args, 'metrics_port', None)):
+        return None
+    from metrics import Metrics
+    return Metrics(command)
+
+def report_metrics(args, metrics):
+    """Print the --profile report and write the --metrics file"""
+    if metrics is None:
+        return
+    out = open_output(args)
+    if args.profile:
+        out.say("")
+        for line in metrics.profile_lines():
+            out.say(line)
+        out.emit('profile', **metrics.report())
+    if args.metrics:
+        metrics.write(args.metrics)
+
+def open_output(args):
+    """Output for this invocation's --format, shared by everything that reports"""
+    from output import Output
+    if getattr(args, 'out', None) is None:
+        args.out = Output(getattr(args, 'format', 'text'))
+    return args.out
+
+def item_record(item):
+    """JSON-ready copy of a digest item, with the date as ISO 8601 UTC"""
+    from datetime import timezone
+    record = dict(item)
+    if item['date'] is not None:
+        record['date'] = datetime.fromtimestamp(item['date'], timezone.utc).isoformat()
+    return record
+
+def cmd_list(args):
+    """List all subscriptions"""
+    out = open_output(args)
+    categories = open_feeds().by_category(args.category)
+    
+    if not categories:
+        out.say("📭 No subscriptions found")
+        return
+    
+    total = sum(len(cat_feeds) for cat_feeds in categories.values())
+    out.say(f"📚 {total} subscriptions\n")
+    
+    for cat, cat_feeds in sorted(categories.items()):
+        out.say(f"\n【{cat}】({len(cat_feeds)})", "-" * 40)
+        for feed in cat_feeds:
+            name = feed.get('name', 'Unknown')
+            url = feed.get('xmlUrl', '')
+            url_display = url[:50] + "..." if len(url) > 50 else url
+            out.say(f"  • {name}")
+            if args.verbose:
+                out.say(f"    URL: {url_display}")
+            out.emit('feed', name=name, xmlUrl=url, htmlUrl=feed.get('htmlUrl'), category=cat)
+
+def cmd_add(args):
+    """Add new subscription"""
+    out = open_output(args)
+    new_feed = {
+        "xmlUrl": args.url,
+        "category": args.category or "Uncategorized"
+    }
+    
+    if args.name:
+        new_feed["name"] = args.name
+    else:
+        from urllib.parse import urlparse
+        parsed = urlparse(args.url)
+        new_feed["name"] = parsed.netloc or "Unnamed"
+    
+    if args.html_url:
+        new_feed["htmlUrl"] = args.html_url
+    
+    with update_feeds() as store:
+        existing = store.get_url(args.url)
+        if existing:
+            out.say(f"⚠️ Already exists: {existing.get('name')}")
+            out.emit('error', message='Already subscribed', name=existing.get('name'), xmlUrl=args.url)
+            return
+        store.add(new_feed)
+    
+    out.say(f"✅ Added: {new_feed['name']}", f"   Category: {new_feed['category']}")
+    out.emit('added', **new_feed)
+
+def cmd_remove(args):
+    """Remove subscription"""
+    out = open_output(args)
+    with update_feeds() as store:
+        removed = store.remove(args.identifier)
+    
+    if not removed:
+        out.say(f"❌ Not found: {args.identifier}")
+        out.emit('error', message='Not found', identifier=args.identifier)
+        return
+    
+    for feed in removed:
+        out.say(f"🗑️ Removed: {feed.get('name')}")
+        out.emit('removed', name=feed.get('name'), xmlUrl=feed.get('xmlUrl'))
+
+def cmd_check(args):
+    """Check feed health"""
+    from fetcher import Throttled, format_bytes
+    from probe import ProbeEngine, describe_error, timing_line
+    
+    out = open_output(args)
+    feeds = load_feeds()
+    
+    if not feeds:
+        out.say("📭 No subscriptions")
+        return
+    
+    health = open_health(args)
+    if args.history:
+        show_health(out, feeds, health, args.verbose)
+        return
+    
+    out.say(f"🔍 Checking {len(feeds)} feeds...\n")
+    
+    cache = open_http_cache(args, 'check')
+    engine = ProbeEngine(args.concurrency, args.per_host, timeout=10, cache=cache,
+                         host_rate=args.host_rate)
+    ok_count = 0
+    fail_count = 0
+    timed = []
+    
+    jobs = [(feed, feed.get('xmlUrl', '')) for feed in feeds]
+    for feed, report, error in engine.run(jobs):
+        name = feed.get('name', 'Unknown')
+        if error is not None:
+            report = {'status': 'failed', 'detail': describe_error(error),
+                      'timings': getattr(error, 'timings', None)}
+        status, detail, timings = report['status'], report['detail'], report['timings']
+        took = f"{timings['total']:.0f} ms" if timings else None
+        if status == 'ok':
+            out.say(f"✅ {name} ({', '.join(filter(None, (detail, took)))})")
+        elif status == 'invalid':
+            out.say(f"⚠️ {name} - {detail}" + (f" ({took})" if took else ""))
+        else:
+            out.say(f"❌ {name} - {detail[:50]}" + (f" ({took})" if took else ""))
+        if report.get('redirects'):
+            chain = ', '.join(f"{hop['status']} → {hop['location']}" for hop in report['redirects'])
+            out.say(f"    ↪ {chain}")
+        if args.verbose and timings:
+            out.say(f"    {timing_line(report)}")
+        if not isinstance(error, Throttled):
+            url = feed.get('xmlUrl', '')
+            health.record(url, status == 'ok', timings['total'] / 1000 if timings else None,
+                          None if status == 'ok' else detail[:200])
+            until = health.retry_at(url)
+            if until is not None:
+                out.say(f"    💤 {health.streak(url)} failures in a row, digest skips it until "
+                        f"{datetime.fromtimestamp(until).strftime('%m-%d %H:%M')}")
+        if status == 'ok':
+            ok_count += 1
+        else:
+            fail_count += 1
+        if timings:
+            timed.append((timings['total'], name, feed.get('xmlUrl'), report))
+        out.emit('check', name=name, xmlUrl=feed.get('xmlUrl'), **report)
+    
+    engine.close()
+    health.save()
+    out.say(f"\n📊 Result: {ok_count} OK, {fail_count} Failed")
+    if engine.throttle_summary():
+        out.say(engine.throttle_summary())
+    if cache is not None:
+        cache.save()
+        out.say(cache.summary())
+    
+    # The feeds that hold up a digest the longest
+    timed.sort(key=lambda entry: entry[0], reverse=True)
+    slowest = timed[:args.slowest]
+    if slowest:
+        out.say(f"\n🐌 Slowest {len(slowest)} feeds:")
+        for total, name, _, report in slowest:
+            t = report['timings']
+            if t['ttfb'] is None:
+                out.say(f"  {total:>7.0f} ms  {name} ({report['detail']})")
+                continue
+            setup = t['dns'] + t['connect'] + t['tls']
+            size = f", {format_bytes(report['size'])}" if report.get('size') is not None else ""
+            out.say(f"  {total:>7.0f} ms  {name} (ttfb {t['ttfb']:.0f} ms, connect {setup:.0f} ms{size})")
+    out.emit('summary', ok=ok_count, failed=fail_count, rate_limited=dict(engine.throttled),
+             deferred=engine.deferred, cache=cache.stats if cache is not None else None,
+             slowest=[{'name': name, 'xmlUrl': url, 'total': total} for total, name, url, _ in slowest])
+
+def show_health(out, feeds, health, verbose):
+    """`check --history`: each feed's recorded results, without touching the network"""
+    import statistics
+    from health import HISTORY
+    
+    def iso(ts):
+        return datetime.fromtimestamp(ts).astimezone().isoformat(timespec='seconds') if ts else None
+    
+    out.say(f"📈 Last {HISTORY} results per feed, oldest first (digest and check runs)\n")
+    failing = 0
+    resting = 0
+    for feed in feeds:
+        name = feed.get('name', 'Unknown')
+        url = feed.get('xmlUrl', '')
+        entry = health.get(url)
+        if not entry or not entry['history']:
+            out.say(f"⚪ {name} - no history")
+            out.emit('health', name=name, xmlUrl=url, history=[], streak=0, retry_at=None, last_ok=None)
+            continue
+        history = entry['history']
+        marks = ''.join('✓' if ok else '✗' for _, ok, _, _ in history)
+        ok_share = sum(1 for _, ok, _, _ in history if ok) / len(history)
+        latencies = [ms for _, ok, ms, _ in history if ok and ms is not None]
+        parts = [f"{ok_share:.0%} ok"]
+        if latencies:
+            parts.append(f"median {statistics.median(latencies):.0f} ms")
+        until = health.retry_at(url)
+        if entry['streak']:
+            failing += 1
+            parts.append(f"{entry['streak']} failures in a row")
+        if until is not None:
+            resting += 1
+            parts.append(f"skipped until {datetime.fromtimestamp(until).strftime('%m-%d %H:%M')}")
+        icon = '💤' if until is not None else '❌' if entry['streak'] else '✅'
+        out.say(f"{icon} {name} {marks} ({', '.join(parts)})")
+        if entry['streak'] and history[-1][3]:
+            out.say(f"    Last error: {history[-1][3][:60]}")
+        if verbose and entry['last_ok']:
+            out.say(f"    Last success: {datetime.fromtimestamp(entry['last_ok']).strftime('%Y-%m-%d %H:%M')}")
+        out.emit('health', name=name, xmlUrl=url, streak=entry['streak'], retry_at=iso(until),
+                 last_ok=iso(entry['last_ok']),
+                 history=[{'time': iso(t), 'ok': ok, 'latency_ms': ms, 'error': error} for t, ok, ms, error in history])
+    out.say(f"\n📊 {failing} feeds failing, {resting} of them skipped by digest")
+    out.emit('summary', feeds=len(feeds), failing=failing, quarantined=resting)
+
+def cmd_fetch(args):
+    """Fetch feed content"""
+    from bodycache import drain
+    from fetcher import FetchEngine, iter_body
+    from feedparse import iter_items
+    from feeddates import DateParser
+    from htmltext import html_to_text, text_key
+    from itemstore import ItemStore, item_key
+    from metrics import timed
+    from searchindex import SearchIndex
+    
+    out = open_output(args)
+    target_feed = open_feeds().get(args.identifier)
+    
+    if not target_feed:
+        out.say(f"❌ Not found: {args.identifier}")
+        out.emit('error', message='Not found', identifier=args.identifier)
+        return
+    
+    url = target_feed.get('xmlUrl')
+    name = target_feed.get('name')
+    limit = args.limit
+    full_content = args.full_content
+    max_chars = args.max_chars if args.max_chars > 0 else None
+    
+    out.say(f"📡 Fetching: {name}{' (full content)' if full_content else ''}\n")
+    
+    cache = open_http_cache(args, 'fetch')
+    bodies = open_body_cache()
+    metrics = open_metrics(args, 'fetch')
+    if metrics is not None:
+        metrics.name(url, name)
+    try:
+        engine = FetchEngine(timeout=15, cache=cache, stream=True, metrics=metrics)
+        body = None
+        age = bodies.age(url) if args.max_age is not None else None
+        if age is not None and age <= args.max_age * 60:
+            body = bodies.open(url)
+        from_cache = body is not None
+        if from_cache:
+            out.say(f"📦 Cached copy from {age / 60:.0f} min ago\n")
+        else:
+            resp, changed = engine.get(url)
+            if not changed:
+                resp.close()
+                # Not modified: show the copy the validators belong to, if it is still kept
+                known = cache.body_hash(url) if cache is not None else None
+                if known is not None and bodies.digest(url) == known:
+                    body = bodies.open(url)
+                from_cache = body is not None
+                if from_cache:
+                    out.say("📦 Not modified, showing the cached copy\n")
+                else:
+                    # No such copy: ask again without validators
+                    if cache is not None:
+                        cache.forget(url)
+                    resp, changed = engine.get(url)
+        if not from_cache:
+            if resp.status_code != 200:
+                resp.close()
+                out.say(f"❌ HTTP {resp.status_code}")
+                out.emit('error', message=f"HTTP {resp.status_code}", feed_name=name, feed_url=url)
+                return
+            # Stream the document and stop downloading once we have enough items
+            body = bodies.store(url, iter_body(resp, cache),
+                                cache.body_stored if cache is not None else None)
+        
+        items = []
+        docs = []
+        timestamp = DateParser().timestamp
+        to_text = html_to_text
+        # Converted article text is cached by content hash, so re-reading an article is free
+        texts = ItemStore(ITEMS_DB) if full_content else None
+        
+        clock = metrics.clock(url) if metrics is not None else None
+        if clock is not None:
+            body = clock.chunks(body)
+            timestamp = clock.wrap('dates', timestamp)
+            to_text = clock.wrap('text', to_text)
+        try:
+            for entry in iter_items(body, content=full_content):
+                summary = entry.summary
+                text = None
+                if full_content and entry.content:
+                    key = text_key(entry.content, max_chars)
+                    cached = texts.get_text(key)
+                    if cached is None:
+                        cached = to_text(entry.content, max_chars)
+                        texts.put_text(key, *cached)
+                    text, truncated = cached
+                    if truncated:
+                        text += "..."
+                
+                item = {
+                    "title": entry.title or 'No Title', 
+                    "link": entry.link, 
+                    "date": entry.published,
+                    "summary": summary[:300] + "..." if len(summary) > 300 else summary,
+                    "content": entry.content if full_content else None,
+                    "text": text
+                }
+                items.append(item)
+                out.emit('item', feed_name=name, feed_url=url, **item)
+                docs.append({
+                    'id': item_key(url, entry.guid, entry.link, entry.title),
+                    'feed_url': url,
+                    'feed_name': name,
+                    'category': target_feed.get('category') or 'Uncategorized',
+                    'title': entry.title,
+                    'link': entry.link,
+                    'date': timestamp(entry.published),
+                    'summary': summary,
+                    'content': entry.content if full_content else None,
+                })
+                if len(items) >= limit:
+                    break
+            if not from_cache:
+                # Finish reading a small feed so a later --max-age fetch can use it
+                drain(body)
+                if cache is not None:
+                    # A big feed cut short left no copy a later 304 could be shown from
+                    cache.confirm(url, stored_only=True)
+                    cache.save()
+        finally:
+            body.close()
+            engine.close()
+            if texts is not None:
+                texts.close()
+            if clock is not None:
+                clock.finish(items=len(items))
+            bodies.save()
+        
+        with timed(metrics, 'index'):
+            index = SearchIndex(ITEMS_DB)
+            index.add(docs)
+            index.close()
+        
+        out.say(f"📰 Latest {len(items)} items:\n")
+        with timed(metrics, 'output'):
+            for i, item in enumerate(items, 1):
+                out.say(f"{'='*50}")
+                out.say(f"{i}. {item['title']}")
+                if item['date']:
+                    out.say(f"   Date: {item['date']}")
+                if args.verbose and item['link']:
+                    out.say(f"   Link: {item['link']}")
+                
+                if full_content and item['text']:
+                    out.say(f"\n📄 Content:\n{item['text']}")
+                elif not full_content:
+                    out.say(f"\n📝 Summary: {item['summary']}")
+                else:
+                    out.say(f"\n⚠️ Full content not available")
+                out.say("")
+            
+    except Exception as e:
+        if metrics is not None:
+            metrics.error(url, e)
+        out.say(f"❌ Failed: {e}")
+        out.emit('error', message=str(e), feed_name=name, feed_url=url)
+    finally:
+        report_metrics(args, metrics)
+
+def cmd_export(args):
+    """Export to OPML"""
+    from xml.etree.ElementTree import Element, SubElement, tostring
+    from xml.dom import minidom
+    
+    out = open_output(args)
+    store = open_feeds()
+    
+    if not len(store):
+        out.say("📭 No subscriptions to export")
+        return
+    
+    opml = Element('opml', version='2.0')
+    
+    head = SubElement(opml, 'head')
+    title = SubElement(head, 'title')
+    title.text = 'RSS Subscriptions'
+    date_created = SubElement(head, 'dateCreated')
+    date_created.text = datetime.now().strftime('%a, %d %b %Y %H:%M:%S GMT')
+    
+    body = SubElement(opml, 'body')
+    
+    categories = store.by_category()
+    
+    for category, cat_feeds in sorted(categories.items()):
+        if len(categories) > 1:
+            cat_outline = SubElement(body, 'outline', text=category, title=category)
+            parent = cat_outline
+        else:
+            parent = body
+        
+        for feed in cat_feeds:
+            attrs = {
+                'type': 'rss',
+                'text': feed.get('name', 'Unknown'),
+                'title': feed.get('name', 'Unknown'),
+                'xmlUrl': feed.get('xmlUrl', '')
+            }
+            if feed.get('htmlUrl'):
+                attrs['htmlUrl'] = feed['htmlUrl']
+            SubElement(parent, 'outline', **attrs)
+    
+    xml_str = tostring(opml, encoding='utf-8')
+    dom = minidom.parseString(xml_str)
+    pretty_xml = dom.toprettyxml(indent='  ', encoding='utf-8')
+    lines = [line for line in pretty_xml.decode('utf-8').split('\n') if line.strip()]
+    pretty_xml = '\n'.join(lines)
+    
+    output_file = args.output or f'rss_export_{datetime.now().strftime("%Y%m%d")}.opml'
+    
+    with open(output_file, 'w', encoding='utf-8') as f:
+        f.write(pretty_xml)
+    
+    out.say(f"✅ Exported: {output_file}", f"📊 {len(store)} feeds, {len(categories)} categories")
+    out.emit('exported', file=output_file, feeds=len(store), categories=len(categories))
+
+def cmd_import(args):
+    """Import from OPML"""
+    from urllib.parse import urlparse
+    from opml import iter_outlines
+    
+    out = open_output(args)
+    if not os.path.exists(args.file):
+        out.say(f"❌ File not found: {args.file}")
+        out.emit('error', message='File not found', file=args.file)
+        return
+    
+    try:
+        new_feeds = list(iter_outlines(args.file))
+        
+        if not new_feeds:
+            out.say("⚠️ No feeds found in OPML")
+            out.emit('imported', added=0, skipped=0)
+            return
+        
+        dead = []
+        moved = {}
+        validate = getattr(args, 'validate', False)
+        if validate:
+            new_feeds, dead, moved = validate_feeds(args, out, new_feeds)
+        
+        for feed in new_feeds:
+            if not feed.get('name'):
+                feed['name'] = urlparse(feed['xmlUrl']).netloc or "Unnamed"
+        
+        added = 0
+        skipped = 0
+        
+        # One locked batch: the file is rewritten once, after all the network work
+        with update_feeds() as store:
+            for feed in new_feeds:
+                if store.add(feed):
+                    added += 1
+                else:
+                    skipped += 1
+
+        out.say(f"✅ Imported: {added} new, {skipped} skipped" + (f", {len(dead)} dead" if validate else ""))
+        out.emit('imported', added=added, skipped=skipped,
+                 **({'dead': dead, 'moved': moved} if validate else {}))
+        
+    except Exception as e:
+        out.say(f"❌ Import failed: {e}")
+        out.emit('error', message=str(e), file=args.file)
+
+def validate_feeds(args, out, feeds):
+    """Fetch the feeds not yet subscribed, concurrently, and keep the live ones.
+    
+    Live feeds get the channel title (when the OPML has no name) and site
+    link (when it has none), and move to where a permanent redirect points.
+    Returns (feeds to import, dead xmlUrls, {old xmlUrl: new xmlUrl}).
+    """
+    from fetcher import FetchEngine, Throttled, iter_body, permanent_url
+    from feedparse import iter_items
+    from probe import describe_error
+    
+    store = open_feeds()
+    pending = {}
+    for feed in feeds:
+        if store.get_url(feed['xmlUrl']) is None:
+            pending.setdefault(feed['xmlUrl'], feed)
+    if not pending:
+        return feeds, [], {}
+    
+    def inspect(feed, resp, changed):
+        """(items, channel meta, permanent URL), or an error string for a dead feed"""
+        if resp.status_code != 200:
+            resp.close()
+            return f"HTTP {resp.status_code}"
+        meta = {}
+        count = 0
+        body = iter_body(resp)
+        try:
+            for _ in iter_items(body, content=False, meta=meta):
+                count += 1
+        except Exception:
+            return "Invalid RSS/Atom"
+        finally:
+            body.close()
+        if not count and 'title' not in meta:
+            return "Invalid RSS/Atom"
+        return count, meta, permanent_url(resp)
+    
+    out.say(f"🔍 Validating {len(pending)} new feeds...\n")
+    engine = FetchEngine(args.concurrency, args.per_host, timeout=10, stream=True,
+                         host_rate=args.host_rate)
+    dead = set()
+    moved = {}
+    for feed, result, error in engine.run([(feed, url) for url, feed in pending.items()], inspect):
+        name = feed.get('name') or feed['xmlUrl']
+        if isinstance(error, Throttled):
+            out.say(f"⏳ {name} - rate limited, imported unchecked")
+            continue
+        if error is not None or isinstance(result, str):
+            detail = describe_error(error) if error is not None else result
+            out.say(f"❌ {name} - {detail[:50]}")
+            out.emit('error', message=detail, name=feed.get('name'), xmlUrl=feed['xmlUrl'])
+            dead.add(feed['xmlUrl'])
+            continue
+        count, meta, new_url = result
+        if not feed.get('name') and meta.get('title'):
+            feed['name'] = meta['title']
+        if not feed.get('htmlUrl') and meta.get('link'):
+            feed['htmlUrl'] = meta['link']
+        if new_url:
+            moved[feed['xmlUrl']] = new_url
+            out.say(f"↪ {name} moved to {new_url}")
+        out.say(f"✅ {feed.get('name') or name} ({count} items)")
+    engine.close()
+    if engine.throttle_summary():
+        out.say(engine.throttle_summary())
+    out.say("")
+    
+    kept = []
+    for feed in feeds:
+        if feed['xmlUrl'] in dead:
+            continue
+        if feed['xmlUrl'] in moved:
+            feed = dict(feed, xmlUrl=moved[feed['xmlUrl']])
+        kept.append(feed)
+    return kept, sorted(dead), moved
+
+def cmd_digest(args):
+    """Get daily digest of updates (concurrent fetch)"""
+    from datetime import datetime, timedelta
+    from bodycache import drain
+    from fetcher import FetchEngine, Throttled, iter_body
+    from feedparse import iter_items
+    from feeddates import DateParser
+    from dedup import Deduper
+    from itemstore import ItemStore, item_key
+    from metrics import timed
+    from searchindex import SearchIndex
+    from topk import CategoryTopK
+    
+    out = open_output(args)
+    feeds = load_feeds()
+    
+    if not feeds:
+        out.say("📭 No subscriptions")
+        return
+    
+    if args.category:
+        feeds = [f for f in feeds if f.get('category') == args.category]
+        if not feeds:
+            out.say(f"📭 No feeds in category '{args.category}'")
+            return
+    
+    now = datetime.now()
+    if args.days:
+        since = now - timedelta(days=args.days)
+    else:
+        since = now.replace(hour=0, minute=0, second=0, microsecond=0)
+    
+    out.say(f"📅 Updates: {since.strftime('%Y-%m-%d %H:%M')} → {now.strftime('%Y-%m-%d %H:%M')}\n")
+    
+    if args.shard:
+        from shards import ShardRing
+        shard, shards = args.shard
+        ring = ShardRing(shards)
+        feeds = [f for f in feeds if ring.shard(f.get('xmlUrl', '')) == shard]
+        out.say(f"🧩 Shard {shard}/{shards}: {len(feeds)} feeds\n")
+    
+    if args.max_feeds > 0:
+        feeds = feeds[:args.max_feeds]
+    
+    # Feeds that kept failing are left out until their quarantine ends
+    health = open_health(args)
+    quarantined = [(feed, health.retry_at(feed.get('xmlUrl', ''))) for feed in feeds]
+    quarantined = [(feed, until) for feed, until in quarantined if until is not None]
+    if quarantined:
+        resting = {id(feed) for feed, _ in quarantined}
+        feeds = [feed for feed in feeds if id(feed) not in resting]
+    
+    # --unseen keeps its own validators so plain digests never hide unstored items
+    cache = open_http_cache(args, 'digest-unseen' if args.unseen else 'digest')
+    bodies = open_body_cache()
+    store = ItemStore(ITEMS_DB) if args.unseen else None
+    index = SearchIndex(ITEMS_DB)
+    metrics = open_metrics(args, 'digest')
+    # The same story through several feeds (aggregators, mirrors) is shown once;
+    # a shard leaves that to digest-merge, which sees the other shards' items
+    deduper = None if args.no_dedup or args.shard else Deduper()
+    all_updates = []
+    processed = 0
+    emitted = 0
+    duplicates = 0
+    failed = []
+    # ndjson writes each feed's items as soon as it completes and keeps nothing
+    streaming = out.format == 'ndjson' and not args.shard
+    
+    # Dates are compared as POSIX timestamps; datetimes are only built for printed items
+    since_ts = since.timestamp()
+    now_ts = now.timestamp()
+    
+    def newest(item):
+        """Sort key: item date, with undated items counted as now"""
+        return now_ts if item['date'] is None else item['date']
+    
+    # Text shows only --limit items per category, so keep just those plus counts
+    top = CategoryTopK(args.limit, key=newest) if out.text and not args.shard else None
+    
+    def in_window(item_ts):
+        """Dated items must fall inside the window; undated ones only count with --unseen"""
+        if item_ts is None:
+            return args.unseen
+        return item_ts >= since_ts
+    
+    # --parse-workers: bodies are parsed in other processes, the threads only download
+    pool = None
+    if args.parse_workers > 0:
+        from parsepool import ParsePool
+        pool = ParsePool(args.parse_workers, since_ts, args.unseen, OLD_ITEMS_BEFORE_STOP)
+    
+    latency = {}
+    
+    def parse_feed_updates(feed, resp, changed):
+        """Extract in-window items from a single feed response"""
+        latency[feed.get('xmlUrl', '')] = resp.elapsed.total_seconds()
+        if not changed or resp.status_code != 200:
+            resp.close()
+            # 4xx/5xx are reported with the other failed feeds
+            resp.raise_for_status()
+            return []
+        url = feed.get('xmlUrl', '')
+        # The validators record which body they belong to, None if it was cut short
+        body = bodies.store(url, iter_body(resp, cache),
+                            cache.body_stored if cache is not None else None)
+        if pool is None:
+            return read_feed_updates(feed, body, True)
+        clock = metrics.clock(url) if metrics is not None else None
+        if clock is not None:
+            body = clock.chunks(body)
+        try:
+            # The whole body is handed over, so every feed is read to the end
+            parsed = pool.parse_body(url, body).result()
+        except BaseException:
+            if clock is not None:
+                clock.finish(rest='wait')
+            raise
+        finally:
+            body.close()
+        return pooled_feed_updates(feed, parsed, clock)
+    
+    def pooled_feed_updates(feed, parsed, clock):
+        """Item dicts for what a parse worker sent back"""
+        rows, count, seconds, _ = parsed
+        if clock is not None:
+            for stage, spent in seconds.items():
+                clock.seconds[stage] += spent
+            # The rest is time spent queued for a free worker
+            clock.finish(rest='wait', items=count)
+        name = feed.get('name', 'Unknown')
+        url = feed.get('xmlUrl', '')
+        category = feed.get('category') or 'Uncategorized'
+        return [{
+            'id': item_id,
+            'title': title or 'No Title',
+            'link': link,
+            'date': item_ts,
+            'feed_name': name,
+            'feed_url': url,
+            'category': category,
+            'summary': summary
+        } for item_id, title, link, item_ts, summary in rows]
+    
+    def read_feed_updates(feed, body, downloading):
+        """Extract in-window items from a feed document streamed as `body`"""
+        name = feed.get('name', 'Unknown')
+        url = feed.get('xmlUrl', '')
+        category = feed.get('category') or 'Uncategorized'
+        items = []
+        timestamp = DateParser().timestamp
+        old_streak = 0
+        parsed = 0
+        
+        # Feeds are newest-first, so stop downloading after a run of items older than the window
+        clock = metrics.clock(url) if metrics is not None else None
+        if clock is not None:
+            body = clock.chunks(body)
+            timestamp = clock.wrap('dates', timestamp)
+        try:
+            for entry in iter_items(body, content=False):
+                parsed += 1
+                item_ts = timestamp(entry.published)
+                
+                if item_ts is not None and item_ts < since_ts:
+                    old_streak += 1
+                    if old_streak >= OLD_ITEMS_BEFORE_STOP:
+                        break
+                    continue
+                old_streak = 0
+                
+                if in_window(item_ts):
+                    items.append({
+                        'id': item_key(url, entry.guid, entry.link, entry.title),
+                        'title': entry.title or 'No Title',
+                        'link': entry.link,
+                        'date': item_ts,
+                        'feed_name': name,
+                        'feed_url': url,
+                        'category': category,
+                        'summary': entry.summary
+                    })
+            
+            if downloading:
+                # A small feed is still read to the end, so a later --max-age can use it
+                drain(body)
+            return items
+        finally:
+            body.close()
+            if clock is not None:
+                clock.finish(items=parsed)
+    
+    engine = FetchEngine(args.concurrency, args.per_host, timeout=10, cache=cache, stream=True,
+                         host_rate=args.host_rate, metrics=metrics)
+    jobs = [(feed, feed.get('xmlUrl', '')) for feed in feeds]
+    # Feeds that failed last time start last, after the ones likely to answer
+    jobs.sort(key=lambda job: health.streak(job[1]) > 0)
+    if metrics is not None:
+        for feed, url in jobs:
+            metrics.name(url, feed.get('name', 'Unknown'))
+    
+    # --max-age: feeds downloaded recently enough are read from their local copy
+    recent = []
+    if args.max_age is not None:
+        remote = []
+        for feed, url in jobs:
+            age = bodies.age(url)
+            (recent if age is not None and age <= args.max_age * 60 else remote).append((feed, url))
+        jobs = remote
+    from_cache = 0
+    
+    def pooled_cache_results():
+        """Cached bodies of `recent`, parsed in the pool, as they complete"""
+        from concurrent.futures import as_completed
+        
+        nonlocal from_cache
+        pending = {}
+        for feed, url in recent:
+            path = bodies.locate(url)
+            if path is None:
+                jobs.append((feed, url))
+                continue
+            clock = metrics.clock(url) if metrics is not None else None
+            pending[pool.parse_file(url, path)] = feed, clock
+        for future in as_completed(pending):
+            feed, clock = pending.pop(future)
+            try:
+                parsed = future.result()
+            except Exception as e:
+                yield feed, None, e
+                continue
+            if parsed is None:
+                # Evicted by another process meanwhile
+                jobs.append((feed, feed.get('xmlUrl', '')))
+                continue
+            from_cache += 1
+            if clock is not None:
+                clock.bytes += parsed[3]
+            yield feed, pooled_feed_updates(feed, parsed, clock), None
+    
+    def recorded(results):
+        """Network results, added to each feed's health history on the way"""
+        from probe import describe_error
+        
+        for feed, items, error in results:
+            url = feed.get('xmlUrl', '')
+            # Being rate limited says nothing about whether the feed works
+            if not isinstance(error, Throttled):
+                health.record(url, error is None, latency.pop(url, None),
+                              None if error is None else describe_error(error)[:200])
+            yield feed, items, error
+    
+    def feed_results():
+        nonlocal from_cache
+        if pool is not None:
+            yield from pooled_cache_results()
+            yield from recorded(engine.run(jobs, parse_feed_updates))
+            return
+        for feed, url in recent:
+            body = bodies.open(url)
+            if body is None:
+                # Evicted by another process meanwhile
+                jobs.append((feed, url))
+                continue
+            from_cache += 1
+            try:
+                yield feed, read_feed_updates(feed, body, False), None
+            except Exception as e:
+                yield feed, None, e
+        yield from recorded(engine.run(jobs, parse_feed_updates))
+    
+    for feed, items, error in feed_results():
+        processed += 1
+        if error is not None:
+            failed.append((feed.get('name', 'Unknown'), error))
+            out.emit('error', message=str(error), feed_name=feed.get('name', 'Unknown'),
+                     feed_url=feed.get('xmlUrl', ''), deferred=isinstance(error, Throttled))
+            continue
+        with timed(metrics, 'index'):
+            index.add(items)
+        if store is not None:
+            with timed(metrics, 'unseen'):
+                items = store.unseen(items)
+                store.add(feed.get('xmlUrl', ''), items)
+        merged = []
+        if deduper is not None:
+            with timed(metrics, 'dedup'):
+                unique = []
+                for item in items:
+                    first = deduper.add(item)
+                    if first is None:
+                        unique.append(item)
+                    else:
+                        merged.append((item, first))
+            duplicates += len(merged)
+            items = unique
+        with timed(metrics, 'output'):
+            if streaming:
+                for item in items:
+                    out.emit('item', **item_record(item))
+                emitted += len(items)
+                # Items already written can't change, so ndjson reports merges separately,
+                # after the batch so `of` always names an item that came before
+                for item, first in merged:
+                    out.emit('duplicate', id=item['id'], of=first, feed_name=item['feed_name'],
+                             feed_url=item['feed_url'], link=item['link'])
+            elif top is not None:
+                for item in items:
+                    top.add(item)
+            else:
+                all_updates.extend(items)
+    engine.close()
+    if pool is not None:
+        pool.close()
+    
+    if cache is not None:
+        cache.save()
+    bodies.save()
+    health.save()
+    if store is not None:
+        store.close()
+    index.close()
+    
+    def print_fetch_report():
+        """Failed and rate-limited feeds, so an empty digest is never silent"""
+        if failed:
+            deferred = sum(1 for _, error in failed if isinstance(error, Throttled))
+            out.say(f"⚠️ {len(failed)} feeds failed ({deferred} deferred by rate limits)"
+                    + ("" if args.verbose else ", use -v to list"))
+            if args.verbose:
+                for name, error in failed:
+                    out.say(f"    {name} - {str(error)[:60]}")
+        if quarantined:
+            out.say(f"💤 {len(quarantined)} failing feeds skipped until their next retry"
+                    + ("" if args.verbose else ", use -v to list"))
+            if args.verbose:
+                for feed, until in quarantined:
+                    out.say(f"    {feed.get('name', 'Unknown')} - {health.streak(feed.get('xmlUrl', ''))} failures in a row, "
+                            f"retry after {datetime.fromtimestamp(until).strftime('%m-%d %H:%M')}")
+        if engine.throttle_summary():
+            out.say(engine.throttle_summary())
+        if cache is not None:
+            out.say(cache.summary())
+        if from_cache:
+            out.say(f"📦 {from_cache} feeds read from local copies (--max-age {args.max_age})")
+        report_metrics(args, metrics)
+        out.emit('summary', since=since.astimezone().isoformat(timespec='seconds'),
+                 until=now.astimezone().isoformat(timespec='seconds'), feeds=processed,
+                 items=emitted, duplicates=duplicates, failed=len(failed), rate_limited=dict(engine.throttled),
+                 deferred=engine.deferred, cache=cache.stats if cache is not None else None,
+                 from_cache=from_cache, quarantined=[feed.get('xmlUrl', '') for feed, _ in quarantined])
+    
+    if args.shard:
+        # Newest first, so digest-merge can merge the partials as streams
+        from shards import write_partial
+        all_updates.sort(key=newest, reverse=True)
+        path = args.output or f"rss_digest_{shard}of{shards}.ndjson"
+        header = {'shard': shard, 'shards': shards,
+                  'since': since.astimezone().isoformat(timespec='seconds'),
+                  'until': now.astimezone().isoformat(timespec='seconds'),
+                  'feeds': processed, 'items': len(all_updates), 'from_cache': from_cache,
+                  'failed': [{'feed_name': name, 'message': str(error), 'deferred': isinstance(error, Throttled)}
+                             for name, error in failed],
+                  'rate_limited': dict(engine.throttled), 'deferred': engine.deferred}
+        with timed(metrics, 'output'):
+            write_partial(path, header, map(item_record, all_updates))
+        emitted += len(all_updates)
+        out.say(f"📝 Shard {shard}/{shards}: {len(all_updates)} items from {processed} feeds → {path}")
+        out.emit('partial', path=path, **header)
+        print_fetch_report()
+        return
+    
+    if not out.text:
+        # json gets every in-window item, newest first; --limit only trims the text view
+        with timed(metrics, 'output'):
+            all_updates.sort(key=newest, reverse=True)
+            for item in all_updates:
+                out.emit('item', **item_record(item))
+        emitted += len(all_updates)
+        print_fetch_report()
+        return
+    
+    if not top.total:
+        out.say(f"📭 No new content in this period (checked {processed} feeds)")
+        print_fetch_report()
+        return
+    
+    merged = f" ({duplicates} duplicates merged)" if duplicates else ""
+    out.say(f"📊 {top.total} new items from {processed} feeds{merged}\n")
+    out.say("="*60)
+    
+    with timed(metrics, 'output'):
+        say_top_items(out, top, args.verbose)
+    
+    out.say(f"\n{'='*60}")
+    out.say(f"🕐 Updated: {now.strftime('%Y-%m-%d %H:%M')}")
+    print_fetch_report()
+
+def say_top_items(out, top, verbose):
+    """The text digest body: each category's newest items from a CategoryTopK"""
+    for category, count, items in top.categories():
+        out.say(f"\n【{category}】({count})")
+        out.say("-"*40)
+        
+        for item in items:
+            time_str = datetime.fromtimestamp(item['date']).strftime('%m-%d %H:%M') if item['date'] is not None else 'undated'.ljust(11)
+            out.say(f"  • [{time_str}] {item['title'][:50]}{'...' if len(item['title']) > 50 else ''}")
+            sources = item.get('sources') or []
+            if len(sources) > 1:
+                names = dict.fromkeys(source['feed_name'] for source in sources)
+                out.say(f"    Sources: {', '.join(names)}")
+            else:
+                out.say(f"    Source: {item['feed_name']}")
+            if verbose and item['link']:
+                out.say(f"    Link: {item['link']}")
+                for source in sources[1:]:
+                    if source['link'] and source['link'] != item['link']:
+                        out.say(f"          {source['link']}")
+        
+        if count > len(items):
+            out.say(f"    ... {count - len(items)} more")
+
+def cmd_digest_merge(args):
+    """Combine the partial files of a sharded digest into one digest"""
+    import heapq
+    from dedup import Deduper
+    from shards import read_partial
+    from topk import CategoryTopK
+    
+    out = open_output(args)
+    partials = []
+    for path in args.files:
+        try:
+            partials.append(read_partial(path))
+        except (OSError, ValueError) as e:
+            out.say(f"❌ {e}")
+            out.emit('error', message=str(e), file=path)
+            return
+    
+    headers = [header for header, _ in partials]
+    shards = {header['shards'] for header in headers}
+    if len(shards) > 1:
+        shardings = ', '.join(f"{header['shard']}/{header['shards']}" for header in headers)
+        out.say(f"❌ Partials of different shardings: {shardings}")
+        out.emit('error', message='Partials of different shardings', files=args.files)
+        return
+    count = shards.pop()
+    present = {header['shard'] for header in headers}
+    missing = [shard for shard in range(1, count + 1) if shard not in present]
+    if missing or len(present) < len(headers):
+        out.say(f"⚠️ Shards of {count}: {len(present)} merged, missing {', '.join(map(str, missing)) or 'none'}"
+                + (", duplicates kept once" if len(present) < len(headers) else ""))
+        seen = set()
+        partials = [(header, records) for header, records in partials
+                    if not (header['shard'] in seen or seen.add(header['shard']))]
+    
+    since = min(datetime.fromisoformat(header['since']) for header, _ in partials)
+    until = max(datetime.fromisoformat(header['until']) for header, _ in partials)
+    out.say(f"📅 Updates: {since.strftime('%Y-%m-%d %H:%M')} → {until.strftime('%Y-%m-%d %H:%M')}\n")
+    
+    def shard_items(header, records):
+        """A partial's items as digest items, with the key they are sorted by"""
+        undated = datetime.fromisoformat(header['until']).timestamp()
+        for record in records:
+            if record['date'] is not None:
+                record['date'] = datetime.fromisoformat(record['date']).timestamp()
+            if args.category is None or record['category'] == args.category:
+                yield (undated if record['date'] is None else record['date']), record
+    
+    deduper = None if args.no_dedup else Deduper()
+    top = CategoryTopK(args.limit, key=lambda item: item['date'] or until.timestamp()) if out.text else None
+    items = 0
+    duplicates = 0
+    # Each partial is newest first, so a k-way merge holds one item per shard
+    merged = heapq.merge(*(shard_items(header, records) for header, records in partials),
+                         key=lambda entry: entry[0], reverse=True)
+    for _, item in merged:
+        if deduper is not None:
+            first = deduper.add(item)
+            if first is not None:
+                duplicates += 1
+                if out.format == 'ndjson':
+                    out.emit('duplicate', id=item['id'], of=first, feed_name=item['feed_name'],
+                             feed_url=item['feed_url'], link=item['link'])
+                continue
+        items += 1
+        if top is not None:
+            top.add(item)
+        else:
+            out.emit('item', **item_record(item))
+    
+    feeds = sum(header['feeds'] for header, _ in partials)
+    failed = [entry for header, _ in partials for entry in header['failed']]
+    
+    def print_merge_report():
+        if failed:
+            deferred = sum(1 for entry in failed if entry['deferred'])
+            out.say(f"⚠️ {len(failed)} feeds failed ({deferred} deferred by rate limits)"
+                    + ("" if args.verbose else ", use -v to list"))
+            if args.verbose:
+                for entry in failed:
+                    out.say(f"    {entry['feed_name']} - {entry['message'][:60]}")
+        rate_limited = {}
+        for header, _ in partials:
+            for host, n in header['rate_limited'].items():
+                rate_limited[host] = rate_limited.get(host, 0) + n
+        out.emit('summary', since=since.isoformat(timespec='seconds'), until=until.isoformat(timespec='seconds'),
+                 feeds=feeds, items=items, duplicates=duplicates, failed=len(failed), rate_limited=rate_limited,
+                 deferred=[url for header, _ in partials for url in header['deferred']],
+                 from_cache=sum(header['from_cache'] for header, _ in partials),
+                 shards=sorted(header['shard'] for header, _ in partials))
+    
+    if top is None:
+        print_merge_report()
+        return
+    
+    if not top.total:
+        out.say(f"📭 No new content in this period (checked {feeds} feeds)")
+        print_merge_report()
+        return
+    
+    merged_note = f" ({duplicates} duplicates merged)" if duplicates else ""
+    out.say(f"📊 {top.total} new items from {feeds} feeds in {len(partials)} shards{merged_note}\n")
+    out.say("="*60)
+    say_top_items(out, top, args.verbose)
+    out.say(f"\n{'='*60}")
+    out.say(f"🕐 Updated: {until.astimezone().strftime('%Y-%m-%d %H:%M')}")
+    print_merge_report()
+
+def cmd_search(args):
+    """Search items already read by digest, fetch and daemon (offline)"""
+    import time
+    from datetime import timedelta
+    from searchindex import SearchIndex
+    
+    out = open_output(args)
+    query = ' '.join(args.query).strip()
+    if not query:
+        out.say("❌ Empty query")
+        out.emit('error', message='Empty query')
+        return
+    
+    since = until = None
+    try:
+        if args.days:
+            since = (datetime.now() - timedelta(days=args.days)).timestamp()
+        if args.since:
+            since = datetime.strptime(args.since, '%Y-%m-%d').timestamp()
+        if args.until:
+            # --until names the last day included
+            until = (datetime.strptime(args.until, '%Y-%m-%d') + timedelta(days=1)).timestamp()
+    except ValueError:
+        out.say("❌ Dates must be YYYY-MM-DD")
+        out.emit('error', message='Dates must be YYYY-MM-DD')
+        return
+    
+    if not os.path.exists(ITEMS_DB):
+        out.say("📭 Nothing indexed yet - run digest or fetch first")
+        out.emit('summary', query=query, results=0)
+        return
+    
+    index = SearchIndex(ITEMS_DB)
+    start = time.perf_counter()
+    results = index.search(query, category=args.category, feed=args.feed,
+                           since=since, until=until, limit=args.limit)
+    elapsed = (time.perf_counter() - start) * 1000
+    index.close()
+    
+    if not results:
+        out.say(f"📭 No matches for \"{query}\"")
+    else:
+        out.say(f"🔎 {len(results)} results for \"{query}\" ({elapsed:.1f} ms)\n")
+    for item in results:
+        time_str = datetime.fromtimestamp(item['date']).strftime('%m-%d %H:%M')
+        out.say(f"  • [{time_str}] {(item['title'] or 'No Title')[:60]}")
+        out.say(f"    Source: {item['feed_name']} ({item['category']})")
+        if item['snippet']:
+            out.say(f"    {item['snippet']}")
+        if args.verbose and item['link']:
+            out.say(f"    Link: {item['link']}")
+        out.emit('item', **item_record(item))
+    out.emit('summary', query=query, results=len(results), ms=round(elapsed, 2))
+
+def cmd_daemon(args):
+    """Poll feeds continuously, each at its own learned interval"""
+    import time
+    from fetcher import FetchEngine, iter_body
+    from feedparse import iter_items
+    from feeddates import DateParser
+    from itemstore import ItemStore, item_key
+    from metrics import timed
+    from scheduler import Scheduler
+    from searchindex import SearchIndex
+    
+    out = open_output(args)
+    scheduler = Scheduler(SCHEDULE_FILE, min_interval=args.min_interval * 60,
+                          max_interval=args.max_interval * 60)
+    cache = open_http_cache(args, 'daemon')
+    store = ItemStore(ITEMS_DB)
+    index = SearchIndex(ITEMS_DB)
+    # Counters accumulate for the life of the daemon, as Prometheus expects
+    metrics = open_metrics(args, 'daemon')
+    if args.metrics_port:
+        metrics.serve(args.metrics_port)
+    engine = FetchEngine(args.concurrency, args.per_host, timeout=10, cache=cache, stream=True,
+                         host_rate=args.host_rate, metrics=metrics)
+    feeds_by_url = {}
+    feeds_mtime = None
+    
+    def poll_feed(feed, resp, changed):
+        """Read a feed until it reaches items already seen.
+        
+        Returns (status, headers, items, timestamps, meta); the headers carry
+        Cache-Control / Retry-After for the scheduler.
+        """
+        url = feed.get('xmlUrl', '')
+        if resp.status_code != 200 or not changed:
+            resp.close()
+            return resp.status_code, resp.headers, [], [], {}
+        
+        newest = scheduler.newest(url)
+        timestamp = DateParser().timestamp
+        items, timestamps, meta = [], [], {}
+        old_streak = 0
+        parsed = 0
+        body = iter_body(resp, cache)
+        clock = metrics.clock(url) if metrics is not None else None
+        if clock is not None:
+            body = clock.chunks(body)
+            timestamp = clock.wrap('dates', timestamp)
+        try:
+            for entry in iter_items(body, content=False, meta=meta):
+                parsed += 1
+                item_ts = timestamp(entry.published)
+                if item_ts is not None:
+                    timestamps.append(item_ts)
+                    if newest is not None and item_ts <= newest:
+                        old_streak += 1
+                        if old_streak >= OLD_ITEMS_BEFORE_STOP:
+                            break
+                        continue
+                old_streak = 0
+                items.append({
+                    'id': item_key(url, entry.guid, entry.link, entry.title),
+                    'title': entry.title or 'No Title',
+                    'link': entry.link,
+                    'date': item_ts,
+                    'feed_name': feed.get('name', 'Unknown'),
+                    'feed_url': url,
+                    'category': feed.get('category') or 'Uncategorized',
+                    'summary': entry.summary
+                })
+        finally:
+            body.close()
+            if clock is not None:
+                clock.finish(items=parsed)
+        return resp.status_code, resp.headers, items, timestamps, meta
+    
+    out.say(f"🛰️ RSS daemon started (intervals {args.min_interval}-{args.max_interval} min)")
+    sys.stdout.flush()
+    try:
+        while True:
+            # Pick up subscriptions added or removed while running
+            mtime = os.path.getmtime(FEEDS_FILE) if os.path.exists(FEEDS_FILE) else None
+            if mtime != feeds_mtime:
+                feeds_mtime = mtime
+                feeds_by_url = {f.get('xmlUrl'): f for f in load_feeds() if f.get('xmlUrl')}
+                scheduler.sync(feeds_by_url)
+            
+            due = scheduler.pop_due()
+            jobs = [(feeds_by_url[url], url) for url in due]
+            if metrics is not None:
+                for feed, url in jobs:
+                    metrics.name(url, feed.get('name', 'Unknown'))
+            for feed, result, error in engine.run(jobs, poll_feed):
+                url = feed.get('xmlUrl', '')
+                if error is not None:
+                    # A Throttled error carries the server's Retry-After
+                    scheduler.failure(url, getattr(error, 'headers', None))
+                    if args.verbose:
+                        out.say(f"❌ {feed.get('name', 'Unknown')} - {str(error)[:50]}")
+                    out.emit('error', message=str(error), feed_name=feed.get('name', 'Unknown'), feed_url=url)
+                    continue
+                
+                status, headers, items, timestamps, meta = result
+                if status not in (200, 304):
+                    scheduler.failure(url, headers)
+                    if args.verbose:
+                        out.say(f"❌ {feed.get('name', 'Unknown')} - HTTP {status}")
+                    out.emit('error', message=f"HTTP {status}", feed_name=feed.get('name', 'Unknown'), feed_url=url)
+                    continue
+                
+                with timed(metrics, 'index'):
+                    index.add(items)
+                with timed(metrics, 'unseen'):
+                    new_items = store.unseen(items)
+                    store.add(url, new_items)
+                scheduler.success(url, timestamps, meta, headers)
+                with timed(metrics, 'output'):
+                    for item in new_items:
+                        time_str = datetime.fromtimestamp(item['date']).strftime('%m-%d %H:%M') if item['date'] is not None else 'undated'.ljust(11)
+                        out.say(f"  • [{time_str}] {item['title'][:50]}{'...' if len(item['title']) > 50 else ''}")
+                        out.say(f"    Source: {item['feed_name']}")
+                        if args.verbose and item['link']:
+                            out.say(f"    Link: {item['link']}")
+                        out.emit('item', **item_record(item))
+                    sys.stdout.flush()
+            
+            if args.verbose and engine.throttle_summary():
+                out.say(engine.throttle_summary())
+            if due:
+                scheduler.save()
+                if cache is not None:
+                    cache.save()
+                if metrics is not None:
+                    metrics.finish_run()
+                    if args.metrics:
+                        metrics.write(args.metrics)
+            if args.once:
+                break
+            
+            next_due = scheduler.next_due()
+            wait = 60 if next_due is None else next_due - time.time()
+            time.sleep(min(60, max(1, wait)))
+    except KeyboardInterrupt:
+        pass
+    finally:
+        scheduler.save()
+        if cache is not None:
+            cache.save()
+        store.close()
+        index.close()
+        engine.close()
+        report_metrics(args, metrics)
+        out.say("🛑 RSS daemon stopped")
+
+def cmd_serve(args):
+    """Run commands sent by rss.py clients over a Unix socket, from a warm process"""
+    from cliserver import serve
+    
+    out = open_output(args)
+    path = os.path.abspath(args.socket)
+    out.say(f"🔌 Serving on {path}")
+    out.say(f"   export RSS_AGENT_SOCKET={path}  # to send rss.py commands here")
+    out.emit('serving', socket=path, pid=os.getpid())
+    out.close()
+    serve(path)
+
+# Subcommands in `rss --help` order: name -> (handler, help)
+COMMANDS = {
+    'list': (cmd_list, 'List all subscriptions'),
+    'add': (cmd_add, 'Add subscription'),
+    'remove': (cmd_remove, 'Remove subscription'),
+    'check': (cmd_check, 'Check feed health'),
+    'fetch': (cmd_fetch, 'Fetch feed content'),
+    'export': (cmd_export, 'Export to OPML'),
+    'import': (cmd_import, 'Import from OPML'),
+    'digest': (cmd_digest, 'Get daily digest'),
+    'digest-merge': (cmd_digest_merge, 'Combine the partial files of digest --shard runs'),
+    'search': (cmd_search, 'Full-text search of fetched items (offline)'),
+    'daemon': (cmd_daemon, 'Poll feeds continuously at adaptive intervals'),
+    'serve': (cmd_serve, 'Keep a warm process answering commands on a Unix socket'),
+}
+
+def add_arguments(command, parser):
+    """Options of one subcommand. Only the command being run gets its own, so
+    `rss list` never imports what `rss digest` needs for its defaults"""
+    if command == 'list':
+        parser.add_argument('-c', '--category', help='Filter by category')
+        parser.add_argument('-v', '--verbose', action='store_true', help='Show details')
+    elif command == 'add':
+        parser.add_argument('url', help='RSS feed URL')
+        parser.add_argument('-n', '--name', help='Custom name')
+        parser.add_argument('-c', '--category', help='Category')
+        parser.add_argument('--html-url', help='Website URL')
+    elif command == 'remove':
+        parser.add_argument('identifier', help='Feed name or URL')
+    elif command == 'check':
+        from fetcher import DEFAULT_CONCURRENCY, DEFAULT_PER_HOST, DEFAULT_HOST_RATE
+        parser.add_argument('--no-cache', action='store_true', help='Ignore cached ETag/Last-Modified')
+        parser.add_argument('--concurrency', type=int, default=DEFAULT_CONCURRENCY, help=f'Max parallel requests (default {DEFAULT_CONCURRENCY})')
+        parser.add_argument('--per-host', type=int, default=DEFAULT_PER_HOST, help=f'Max parallel requests per host (default {DEFAULT_PER_HOST})')
+        parser.add_argument('--host-rate', type=float, default=DEFAULT_HOST_RATE, help=f'Max requests per second to one host, 0=unlimited (default {DEFAULT_HOST_RATE:g})')
+        parser.add_argument('--slowest', type=int, default=0, metavar='N', help='List the N slowest feeds at the end')
+        parser.add_argument('-v', '--verbose', action='store_true', help='Show DNS/connect/TLS/TTFB timings and bytes per feed')
+        parser.add_argument('--history', action='store_true', help="Show each feed's recent results and quarantine instead of checking")
+    elif command == 'fetch':
+        from htmltext import DEFAULT_MAX_CHARS
+        parser.add_argument('identifier', help='Feed name or URL')
+        parser.add_argument('-n', '--limit', type=int, default=5, help='Number of items (default 5)')
+        parser.add_argument('-v', '--verbose', action='store_true', help='Show links')
+        parser.add_argument('--full-content', action='store_true', help='Get full content (if supported)')
+        parser.add_argument('--max-chars', type=int, default=DEFAULT_MAX_CHARS, help=f'Full content text budget per item, 0=unlimited (default {DEFAULT_MAX_CHARS})')
+        parser.add_argument('--no-cache', action='store_true', help='Ignore cached ETag/Last-Modified')
+        parser.add_argument('--max-age', type=int, metavar='MIN', help='Use the copy downloaded within MIN minutes, if any, without the network')
+        parser.add_argument('--profile', action='store_true', help='Report time per stage (network, parsing, dates, output) and per feed')
+        parser.add_argument('--metrics', metavar='PATH', help='Write metrics to PATH: JSON for *.json, else Prometheus text')
+    elif command == 'export':
+        parser.add_argument('-o', '--output', help='Output filename')
+    elif command == 'import':
+        from fetcher import DEFAULT_CONCURRENCY, DEFAULT_PER_HOST, DEFAULT_HOST_RATE
+        parser.add_argument('file', help='OPML file path')
+        parser.add_argument('--validate', action='store_true', help='Fetch new feeds first: skip dead ones, fill in titles and site links, follow permanent redirects')
+        parser.add_argument('--concurrency', type=int, default=DEFAULT_CONCURRENCY, help=f'Max parallel requests with --validate (default {DEFAULT_CONCURRENCY})')
+        parser.add_argument('--per-host', type=int, default=DEFAULT_PER_HOST, help=f'Max parallel requests per host with --validate (default {DEFAULT_PER_HOST})')
+        parser.add_argument('--host-rate', type=float, default=DEFAULT_HOST_RATE, help=f'Max requests per second to one host with --validate, 0=unlimited (default {DEFAULT_HOST_RATE:g})')
+    elif command == 'digest':
+        from fetcher import DEFAULT_CONCURRENCY, DEFAULT_PER_HOST, DEFAULT_HOST_RATE
+        from health import QUARANTINE_AFTER
+        from shards import parse_shard
+        parser.add_argument('-d', '--days', type=int, help='Last N days')
+        parser.add_argument('-n', '--limit', type=int, default=3, help='Items per category (default 3)')
+        parser.add_argument('-c', '--category', help='Filter by category')
+        parser.add_argument('-v', '--verbose', action='store_true', help='Show links')
+        parser.add_argument('--max-feeds', type=int, default=0, help='Max feeds to check (0=all)')
+        parser.add_argument('--no-cache', action='store_true', help='Ignore cached ETag/Last-Modified')
+        parser.add_argument('--max-age', type=int, metavar='MIN', help='Read feeds downloaded within MIN minutes from the local copy instead of the network')
+        parser.add_argument('--concurrency', type=int, default=DEFAULT_CONCURRENCY, help=f'Max parallel requests (default {DEFAULT_CONCURRENCY})')
+        parser.add_argument('--per-host', type=int, default=DEFAULT_PER_HOST, help=f'Max parallel requests per host (default {DEFAULT_PER_HOST})')
+        parser.add_argument('--host-rate', type=float, default=DEFAULT_HOST_RATE, help=f'Max requests per second to one host, 0=unlimited (default {DEFAULT_HOST_RATE:g})')
+        parser.add_argument('--unseen', action='store_true', help='Only items not shown by a previous --unseen digest')
+        parser.add_argument('--no-dedup', action='store_true', help='Show every copy of a story carried by several feeds')
+        parser.add_argument('--quarantine-after', type=int, default=QUARANTINE_AFTER, metavar='N', help=f'Skip feeds that failed N runs in a row, retrying them with exponential backoff; 0=never (default {QUARANTINE_AFTER})')
+        parser.add_argument('--shard', type=parse_shard, metavar='i/N', help='Only the feeds of shard i of N (consistent hashing of xmlUrl); write them to a partial file for digest-merge')
+        parser.add_argument('-o', '--output', help='Partial file of --shard (default rss_digest_<i>of<N>.ndjson)')
+        parser.add_argument('--parse-workers', type=int, default=0, metavar='N', help='Parse feeds in N worker processes, for CPU-bound runs (default 0: on the fetch threads)')
+        parser.add_argument('--profile', action='store_true', help='Report time per stage (network, parsing, dates, output) and per feed')
+        parser.add_argument('--metrics', metavar='PATH', help='Write metrics to PATH: JSON for *.json, else Prometheus text')
+    elif command == 'digest-merge':
+        parser.add_argument('files', nargs='+', help='Partial files written by digest --shard')
+        parser.add_argument('-n', '--limit', type=int, default=3, help='Items per category (default 3)')
+        parser.add_argument('-c', '--category', help='Filter by category')
+        parser.add_argument('-v', '--verbose', action='store_true', help='Show links')
+        parser.add_argument('--no-dedup', action='store_true', help='Show every copy of a story carried by several feeds')
+    elif command == 'search':
+        parser.add_argument('query', nargs='+', help='Words, "phrases", OR/NOT, prefix*')
+        parser.add_argument('-c', '--category', help='Filter by category')
+        parser.add_argument('-f', '--feed', help='Filter by feed name or URL')
+        parser.add_argument('-d', '--days', type=int, help='Last N days')
+        parser.add_argument('--since', help='From this day (YYYY-MM-DD)')
+        parser.add_argument('--until', help='Up to and including this day (YYYY-MM-DD)')
+        parser.add_argument('-n', '--limit', type=int, default=20, help='Max results (default 20)')
+        parser.add_argument('-v', '--verbose', action='store_true', help='Show links')
+    elif command == 'daemon':
+        from fetcher import DEFAULT_CONCURRENCY, DEFAULT_PER_HOST, DEFAULT_HOST_RATE
+        parser.add_argument('--min-interval', type=int, default=5, help='Shortest poll interval in minutes (default 5)')
+        parser.add_argument('--max-interval', type=int, default=1440, help='Longest poll interval in minutes (default 1440)')
+        parser.add_argument('--concurrency', type=int, default=DEFAULT_CONCURRENCY, help=f'Max parallel requests (default {DEFAULT_CONCURRENCY})')
+        parser.add_argument('--per-host', type=int, default=DEFAULT_PER_HOST, help=f'Max parallel requests per host (default {DEFAULT_PER_HOST})')
+        parser.add_argument('--host-rate', type=float, default=DEFAULT_HOST_RATE, help=f'Max requests per second to one host, 0=unlimited (default {DEFAULT_HOST_RATE:g})')
+        parser.add_argument('--no-cache', action='store_true', help='Ignore cached ETag/Last-Modified')
+        parser.add_argument('--once', action='store_true', help='Poll the feeds that are due, then exit')
+        parser.add_argument('-v', '--verbose', action='store_true', help='Show links and errors')
+        parser.add_argument('--profile', action='store_true', help='Report time per stage (network, parsing, dates, output) and per feed')
+        parser.add_argument('--metrics', metavar='PATH', help='Write metrics to PATH: JSON for *.json, else Prometheus text')
+        parser.add_argument('--metrics-port', type=int, metavar='PORT', help='Serve Prometheus metrics at http://127.0.0.1:PORT/metrics')
+    elif command == 'serve':
+        parser.add_argument('--socket', default=SOCKET_FILE, help=f'Socket path (default {SOCKET_FILE})')
+
+def main(argv=None):
+    from output import FORMATS
+    
+    argv = sys.argv[1:] if argv is None else argv
+    parser = argparse.ArgumentParser(
+        prog='rss',
+        description='RSS Agent CLI - Manage your RSS subscriptions',
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+        epilog='''
+Examples:
+  rss list                      # List all subscriptions
+  rss list --category Tech      # Filter by category
+  rss add https://example.com/feed.xml --category Tech
+  rss remove "Feed Name"
+  rss check                     # Check feed health
+  rss check --history           # Recent results, failure streaks, quarantined feeds
+  rss fetch "Feed Name" --limit 3      # Get latest 3 items
+  rss digest                    # Get today's updates
+  rss digest -d 2               # Get last 2 days updates
+  rss digest --unseen           # Only items not seen before
+  rss digest --format ndjson    # One JSON item per line, streamed
+  rss daemon                    # Poll feeds continuously
+  rss digest --shard 1/4        # This node's quarter of the feeds, to a partial file
+  rss digest-merge rss_digest_*of4.ndjson   # One digest from the partials
+  rss search "rust async" -d 7  # Search items already fetched
+  rss export                    # Export to OPML
+  rss import follow.opml        # Import from OPML
+  rss import follow.opml --validate   # Only live feeds, with their real titles
+  rss serve                     # Answer RSS_AGENT_SOCKET clients from a warm process
+        '''
+    )
+    
+    # --format is accepted by every command
+    format_parser = argparse.ArgumentParser(add_help=False)
+    format_parser.add_argument('--format', choices=FORMATS, default='text', help='Output format: text, json, or ndjson streamed as it arrives (default text)')
+    
+    subparsers = parser.add_subparsers(dest='command', help='Available commands')
+    # The command is the first word that is not an option
+    command = next((arg for arg in argv if not arg.startswith('-')), None)
+    for name, (_, help_text) in COMMANDS.items():
+        command_parser = subparsers.add_parser(name, help=help_text, parents=[format_parser])
+        if name == command:
+            add_arguments(name, command_parser)
+    
+    args = parser.parse_args(argv)
+    
+    if not args.command:
+        parser.print_help()
+        sys.exit(1)
+    
+    out = open_output(args)
+    try:
+        COMMANDS[args.command][0](args)
+    finally:
+        out.close()
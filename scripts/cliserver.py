@@ -0,0 +1,161 @@
+"""
+RSS Agent command server - a warm process running rss.py commands sent over a Unix socket
+"""
+
+import json
+import os
+import signal
+import socket
+import socketserver
+import sys
+
+# Commands that never finish, or are the server, always run in the client
+LOCAL_COMMANDS = ('serve', 'daemon')
+# Everything the commands import, loaded once so each forked worker starts warm
+WARM_MODULES = ('cli', 'output', 'subscriptions', 'fetcher', 'probe', 'feedparse', 'feeddates',
+                'htmltext', 'itemstore', 'searchindex', 'dedup', 'topk', 'metrics', 'bodycache',
+                'scheduler', 'locking', 'opml', 'parsepool', 'shards', 'health', 'requests', 'sqlite3',
+                'xml.etree.ElementTree')
+MAX_REQUEST = 1024 * 1024
+
+
+def forward(path, argv):
+    """Run a command in the server listening on `path`, writing straight to our stdout and stderr.
+
+    Returns the command's exit code, or None when it should run in this
+    process instead: nothing listens on `path`, the command is one of
+    LOCAL_COMMANDS, or the server serves another HOME.
+    """
+    command = next((arg for arg in argv if not arg.startswith('-')), None)
+    if command in LOCAL_COMMANDS:
+        return None
+    sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    try:
+        sock.connect(path)
+    except OSError:
+        sock.close()
+        return None
+    with sock:
+        request = {'argv': argv, 'cwd': os.getcwd(), 'home': os.path.expanduser('~')}
+        socket.send_fds(sock, [json.dumps(request).encode('utf-8') + b'\n'],
+                        [sys.stdout.fileno(), sys.stderr.fileno()])
+        reply = sock.makefile('rb').readline()
+    try:
+        reply = json.loads(reply)
+    except ValueError:
+        print("❌ rss serve went away while running the command", file=sys.stderr)
+        return 1
+    if 'refused' in reply:
+        return None
+    return reply['exit']
+
+
+def run(argv):
+    """Run one command in this process; returns its exit code"""
+    from cli import main
+
+    try:
+        main(argv)
+        return 0
+    except SystemExit as e:
+        if e.code is None or isinstance(e.code, int):
+            return e.code or 0
+        print(e.code, file=sys.stderr)
+        return 1
+    except Exception:
+        import traceback
+        traceback.print_exc()
+        return 1
+    finally:
+        try:
+            sys.stdout.flush()
+            sys.stderr.flush()
+        except OSError:
+            pass
+
+
+class CommandServer(socketserver.ForkingMixIn, socketserver.UnixStreamServer):
+    """Forks a worker per connection, which inherits everything imported at startup"""
+
+
+class CommandHandler(socketserver.BaseRequestHandler):
+    """One request: a JSON line {"argv": [...], "cwd": ..., "home": ...}, optionally
+    carrying the client's stdout and stderr descriptors (SCM_RIGHTS). Without them,
+    as from socat or nc, output comes back over the socket. The reply is a JSON
+    line, {"exit": code} or {"refused": reason} when the client should run the
+    command itself."""
+
+    def handle(self):
+        signal.signal(signal.SIGTERM, signal.SIG_DFL)
+        conn = self.request
+        data, fds = b'', []
+        while not data.endswith(b'\n') and len(data) < MAX_REQUEST:
+            chunk, received, _, _ = socket.recv_fds(conn, 65536, 2)
+            fds += received
+            if not chunk:
+                break
+            data += chunk
+        try:
+            request = json.loads(data)
+            argv = [str(arg) for arg in request['argv']]
+        except (ValueError, KeyError, TypeError):
+            self.reply(refused='bad request')
+            return
+        home = os.path.expanduser('~')
+        if request.get('home', home) != home:
+            self.reply(refused=f"serving HOME={home}")
+            return
+
+        out_fd, err_fd = fds[:2] if len(fds) >= 2 else (conn.fileno(), conn.fileno())
+        os.dup2(out_fd, 1)
+        os.dup2(err_fd, 2)
+        for fd in fds:
+            os.close(fd)
+        try:
+            os.chdir(request.get('cwd') or home)
+        except OSError as e:
+            print(f"❌ {e}", file=sys.stderr)
+            self.reply(exit=1)
+            return
+        self.reply(exit=run(argv))
+
+    def reply(self, **fields):
+        try:
+            self.request.sendall(json.dumps(fields).encode('utf-8') + b'\n')
+        except OSError:
+            pass
+
+
+def serve(path):
+    """Import everything, then answer connections on `path` until interrupted"""
+    import importlib
+
+    for name in WARM_MODULES:
+        importlib.import_module(name)
+
+    if os.path.exists(path):
+        probe = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        try:
+            probe.connect(path)
+            raise SystemExit(f"❌ Another rss serve is listening on {path}")
+        except OSError:
+            # Left behind by a server that was killed
+            os.unlink(path)
+        finally:
+            probe.close()
+
+    signal.signal(signal.SIGTERM, lambda signum, frame: sys.exit(0))
+    # Whoever can connect can run any command as this user
+    umask = os.umask(0o177)
+    try:
+        server = CommandServer(path, CommandHandler)
+    finally:
+        os.umask(umask)
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        if os.path.exists(path):
+            os.unlink(path)
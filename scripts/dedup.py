@@ -0,0 +1,156 @@
+"""
+RSS Agent deduplication - collapse the same story seen through several feeds
+"""
+
+import hashlib
+import re
+from functools import lru_cache
+from urllib.parse import parse_qsl, urlencode
+
+# Query parameters that only identify the referrer, never the page
+TRACKING_PARAMS = {'fbclid', 'gclid', 'dclid', 'msclkid', 'yclid', 'igshid', 'mc_cid', 'mc_eid',
+                   '_hsenc', '_hsmi', 'mkt_tok', 'ref', 'ref_src', 'source', 'cmpid', 'spm'}
+
+STOPWORDS = {'a', 'an', 'and', 'are', 'as', 'at', 'be', 'by', 'for', 'from', 'how', 'in', 'is',
+             'it', 'its', 'of', 'on', 'or', 'that', 'the', 'this', 'to', 'with', 'why', 'what',
+             'show', 'ask', 'hn', 'via'}
+
+# MinHash signature of NUM_HASHES values, split into BANDS bands for LSH:
+# titles sharing any band are compared, which with 2 rows per band catches
+# pairs above roughly 35% similarity; TITLE_SIMILARITY then decides
+NUM_HASHES = 16
+BANDS = 8
+TITLE_SIMILARITY = 0.6
+MIN_TITLE_WORDS = 3
+
+
+def canonical_url(url):
+    """URL identity for dedup: no scheme, www., fragment, tracking parameters or trailing slash"""
+    if not url:
+        return None
+    # Plain string splitting; urlsplit() costs more than the rest of dedup together
+    rest = url.strip().partition('://')[2] or url.strip()
+    rest = rest.partition('#')[0]
+    rest, _, query = rest.partition('?')
+    host, _, path = rest.partition('/')
+    host = host.rpartition('@')[2].lower()
+    if host.endswith((':80', ':443')):
+        host = host.rpartition(':')[0]
+    if host.startswith('www.'):
+        host = host[4:]
+    key = host + ('/' + path).rstrip('/')
+    if query:
+        params = sorted((k, v) for k, v in parse_qsl(query, keep_blank_values=True)
+                        if not k.lower().startswith('utm_') and k.lower() not in TRACKING_PARAMS)
+        if params:
+            key += '?' + urlencode(params)
+    return key
+
+
+def title_words(title):
+    """Distinctive lowercase words of a title"""
+    return frozenset(w for w in re.findall(r'\w+', (title or '').lower()) if w not in STOPWORDS)
+
+
+def title_numbers(title):
+    """Numbers in a title, in order; "3.12.1" and "3.12.2" are different releases"""
+    return tuple(re.findall(r'\d+', title or ''))
+
+
+def _digitless(words):
+    return frozenset(w for w in words if not re.search(r'\d', w))
+
+
+@lru_cache(maxsize=100000)
+def _word_hashes(word):
+    """NUM_HASHES independent 16-bit hashes of a word, cut from one blake2b digest"""
+    return tuple(memoryview(hashlib.blake2b(word.encode('utf-8'), digest_size=NUM_HASHES * 2).digest()).cast('H'))
+
+
+def minhash(words):
+    """MinHash signature of a word set (NUM_HASHES values)"""
+    return list(map(min, zip(*map(_word_hashes, words))))
+
+
+class Deduper:
+    """Groups items that are the same story: equal canonical URL or near-equal title.
+
+    A title only matches a story with the same numbers in it and no item
+    from the same feed, so a feed's release or weekly series stays apart;
+    similarity is then measured on the other words, as shared numbers say
+    little ("Foo 2.1 released" and "Bar 2.1 released").
+    Lookups go through hash tables (URL key, exact title, MinHash LSH bands),
+    so adding an item never compares it against every earlier one. Each
+    story keeps only its title words and numbers, first item id and a
+    `sources` list shared with its first item, which later duplicates are
+    appended to.
+    """
+
+    def __init__(self):
+        self.by_url = {}
+        self.by_title = {}
+        self.bands = {}
+        self.stories = []
+
+    def _title_may_match(self, story, numbers, feed_url):
+        _, story_numbers, _, sources = self.stories[story]
+        return story_numbers == numbers and not (feed_url and any(
+            source['feed_url'] == feed_url for source in sources))
+
+    def _similar_story(self, words, plain, numbers, feed_url):
+        signature = minhash(words)
+        rows = NUM_HASHES // BANDS
+        # Only titles with the same numbers may match, so they share the buckets
+        keys = [(band, tuple(signature[band * rows:(band + 1) * rows]), numbers) for band in range(BANDS)]
+        match = None
+        for key in keys:
+            for story in self.bands.get(key, ()):
+                if not self._title_may_match(story, numbers, feed_url):
+                    continue
+                other = self.stories[story][0]
+                union = len(plain | other)
+                if union and len(plain & other) / union >= TITLE_SIMILARITY:
+                    match = story
+                    break
+            if match is not None:
+                break
+        return match, keys
+
+    def add(self, item):
+        """Register an item; returns the id of its story's first item if it is a duplicate, else None"""
+        source = {'feed_name': item.get('feed_name'), 'feed_url': item.get('feed_url'),
+                  'link': item.get('link')}
+        url = canonical_url(item.get('link'))
+        words = title_words(item.get('title'))
+        numbers = title_numbers(item.get('title'))
+        plain = _digitless(words) if numbers else words
+        title = ' '.join(sorted(words))
+
+        # Titles too short to tell stories apart ("Release notes") only match by URL
+        long_title = len(words) >= MIN_TITLE_WORDS
+        story = self.by_url.get(url) if url else None
+        if story is None and long_title:
+            story = self.by_title.get(title)
+            if story is not None and not self._title_may_match(story, numbers, source['feed_url']):
+                story = None
+        band_keys = ()
+        if story is None and long_title:
+            story, band_keys = self._similar_story(words, plain, numbers, source['feed_url'])
+
+        if story is not None:
+            first, sources = self.stories[story][2:]
+            sources.append(source)
+        else:
+            story = len(self.stories)
+            item['sources'] = [source]
+            self.stories.append((plain, numbers, item.get('id'), item['sources']))
+            for key in band_keys:
+                self.bands.setdefault(key, []).append(story)
+            first = None
+
+        # Later spellings of the story find it too
+        if url:
+            self.by_url.setdefault(url, story)
+        if long_title:
+            self.by_title.setdefault(title, story)
+        return first
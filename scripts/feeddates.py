@@ -0,0 +1,124 @@
+"""
+RSS Agent date handling - timezone-correct parsing of feed dates into
+POSIX timestamps, remembering which format each feed uses
+"""
+
+import calendar
+from datetime import datetime
+
+MONTHS = {m: i for i, m in enumerate(
+    ('jan', 'feb', 'mar', 'apr', 'may', 'jun', 'jul', 'aug', 'sep', 'oct', 'nov', 'dec'), 1)}
+
+# Zone names seen in the wild, in seconds east of UTC
+ZONES = {
+    'gmt': 0, 'ut': 0, 'utc': 0, 'z': 0,
+    'edt': -4 * 3600, 'est': -5 * 3600, 'cdt': -5 * 3600, 'cst': -6 * 3600,
+    'mdt': -6 * 3600, 'mst': -7 * 3600, 'pdt': -7 * 3600, 'pst': -8 * 3600,
+}
+
+EPOCH = datetime(1970, 1, 1)
+
+# Memo tables shared by all feeds: a digest sees few distinct days and zones
+_DAY_SECONDS = {}
+_ZONE_OFFSETS = {}
+
+
+def _offset(zone):
+    """Seconds east of UTC for '+0200', '-05:00' or a zone name; None if unknown"""
+    offset = _ZONE_OFFSETS.get(zone)
+    if offset is not None:
+        return offset
+    if not zone:
+        offset = 0
+    elif zone[0] in '+-':
+        digits = zone[1:].replace(':', '')
+        if len(digits) != 4 or not digits.isdigit():
+            return None
+        offset = int(digits[:2]) * 3600 + int(digits[2:]) * 60
+        if zone[0] == '-':
+            offset = -offset
+    else:
+        offset = ZONES.get(zone.lower())
+        if offset is None:
+            return None
+    _ZONE_OFFSETS[zone] = offset
+    return offset
+
+
+def _rfc822(value):
+    """Fast path for 'Mon, 06 Jan 2025 10:00:00 +0000' and close variants"""
+    parts = value.split()
+    if parts and not parts[0][0].isdigit():
+        parts = parts[1:]  # weekday
+    if len(parts) < 4:
+        return None
+    day, month, year, clock = parts[:4]
+    offset = _offset(parts[4] if len(parts) > 4 else '')
+    if offset is None:
+        return None
+
+    key = (day, month, year)
+    base = _DAY_SECONDS.get(key)
+    if base is None:
+        month_num = MONTHS.get(month[:3].lower())
+        if month_num is None:
+            return None
+        year_num = int(year)
+        if year_num < 100:
+            year_num += 2000 if year_num < 50 else 1900
+        base = (datetime(year_num, month_num, int(day)) - EPOCH).days * 86400
+        if len(_DAY_SECONDS) > 100000:
+            _DAY_SECONDS.clear()
+        _DAY_SECONDS[key] = base
+
+    hms = clock.split(':')
+    if len(hms) < 2:
+        return None
+    seconds = int(hms[0]) * 3600 + int(hms[1]) * 60 + (int(hms[2]) if len(hms) > 2 else 0)
+    return base + seconds - offset
+
+
+def _iso8601(value):
+    dt = datetime.fromisoformat(value.strip().replace('Z', '+00:00').replace('z', '+00:00'))
+    if dt.tzinfo is None:
+        # Values without an offset are taken as UTC, the usual intent of feed generators
+        return calendar.timegm(dt.timetuple()) + dt.microsecond / 1e6
+    return dt.timestamp()
+
+
+def _email(value):
+    from email.utils import parsedate_tz, mktime_tz
+    parsed = parsedate_tz(value)
+    return mktime_tz(parsed) if parsed else None
+
+
+# Tried in order until one succeeds; the winner is remembered per feed
+PARSERS = (_rfc822, _iso8601, _email)
+
+
+class DateParser:
+    """Parses one feed's dates, trying the format that worked last time first.
+
+    Feeds use a single date format for all their items, so after the first
+    item nearly every value is parsed by the first attempt.
+    """
+
+    __slots__ = ('order',)
+
+    def __init__(self):
+        self.order = PARSERS
+
+    def timestamp(self, value):
+        """POSIX timestamp for a feed date string, or None if it cannot be parsed"""
+        if not value:
+            return None
+        for parser in self.order:
+            try:
+                ts = parser(value)
+            except (ValueError, TypeError, OverflowError):
+                continue
+            if ts is not None:
+                if parser is not self.order[0]:
+                    self.order = (parser,) + tuple(p for p in self.order if p is not parser)
+                return ts
+        return None
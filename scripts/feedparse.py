@@ -0,0 +1,221 @@
+"""
+RSS Agent feed parsing - one normalized, incremental parser for
+RSS 2.0, Atom, RSS 1.0/RDF and JSON Feed
+"""
+
+import xml.etree.ElementTree as ET
+
+ATOM_NS = '{http://www.w3.org/2005/Atom}'
+CONTENT_NS = '{http://purl.org/rss/1.0/modules/content/}'
+DC_NS = '{http://purl.org/dc/elements/1.1/}'
+RDF_NS = '{http://www.w3.org/1999/02/22-rdf-syntax-ns#}'
+RSS1_NS = '{http://purl.org/rss/1.0/}'
+RSS09_NS = '{http://my.netscape.com/rdf/simple/0.9/}'
+SY_NS = '{http://purl.org/rss/1.0/modules/syndication/}'
+
+# Namespaced tag names, resolved once at import instead of per findtext() call
+ATOM_LINK = f'{ATOM_NS}link'
+ATOM_TITLE = f'{ATOM_NS}title'
+ATOM_ID = f'{ATOM_NS}id'
+ATOM_PUBLISHED = f'{ATOM_NS}published'
+ATOM_UPDATED = f'{ATOM_NS}updated'
+ATOM_SUMMARY = f'{ATOM_NS}summary'
+ATOM_CONTENT = f'{ATOM_NS}content'
+CONTENT_ENCODED = f'{CONTENT_NS}encoded'
+DC_DATE = f'{DC_NS}date'
+RDF_ABOUT = f'{RDF_NS}about'
+
+# Channel-level publishing hints collected into the optional `meta` dict
+META_TAGS = {
+    'ttl': 'ttl',
+    f'{SY_NS}updatePeriod': 'update_period',
+    f'{SY_NS}updateFrequency': 'update_frequency',
+}
+
+
+class FeedItem:
+    """Normalized feed entry. Dates are left as the raw strings from the feed."""
+
+    __slots__ = ('title', 'link', 'guid', 'published', 'summary', 'content')
+
+    def __init__(self, title='', link='', guid='', published='', summary='', content=None):
+        self.title = title
+        self.link = link
+        self.guid = guid
+        self.published = published
+        self.summary = summary
+        self.content = content
+
+    def __repr__(self):
+        return f"FeedItem({self.title!r}, {self.link!r})"
+
+
+def _text(elem):
+    """Element text, serializing inline XHTML children when present"""
+    if elem is None:
+        return ''
+    if len(elem):
+        return (elem.text or '') + ''.join(
+            ET.tostring(child, encoding='unicode') for child in elem)
+    return elem.text or ''
+
+
+def _rss_item(elem, want_content):
+    find = elem.findtext
+    guid = (find('guid') or '').strip()
+    link = (find('link') or '').strip()
+    if not link and guid.startswith(('http://', 'https://')):
+        # Permalink GUIDs double as the item link
+        link = guid
+    return FeedItem(
+        title=(find('title') or '').strip(),
+        link=link,
+        guid=guid,
+        published=(find('pubDate') or find(DC_DATE) or '').strip(),
+        summary=find('description') or '',
+        content=find(CONTENT_ENCODED) if want_content else None,
+    )
+
+
+def _rdf_item(elem, want_content, ns):
+    find = elem.findtext
+    return FeedItem(
+        title=(find(f'{ns}title') or '').strip(),
+        link=(find(f'{ns}link') or '').strip(),
+        guid=elem.get(RDF_ABOUT, ''),
+        published=(find(DC_DATE) or '').strip(),
+        summary=find(f'{ns}description') or '',
+        content=find(CONTENT_ENCODED) if want_content else None,
+    )
+
+
+def _atom_link(elem):
+    """href of the alternate link, else of the first link"""
+    link = ''
+    for node in elem.iterfind(ATOM_LINK):
+        rel = node.get('rel', 'alternate')
+        if rel == 'alternate':
+            return node.get('href', '')
+        if not link:
+            link = node.get('href', '')
+    return link
+
+
+def _atom_item(elem, want_content):
+    find = elem.findtext
+    return FeedItem(
+        title=_text(elem.find(ATOM_TITLE)).strip(),
+        link=_atom_link(elem),
+        guid=(find(ATOM_ID) or '').strip(),
+        published=(find(ATOM_PUBLISHED) or find(ATOM_UPDATED) or '').strip(),
+        summary=_text(elem.find(ATOM_SUMMARY)),
+        content=_text(elem.find(ATOM_CONTENT)) or None if want_content else None,
+    )
+
+
+# Item element tag -> record builder
+ITEM_BUILDERS = {
+    'item': _rss_item,
+    f'{RSS1_NS}item': lambda elem, want_content: _rdf_item(elem, want_content, RSS1_NS),
+    f'{RSS09_NS}item': lambda elem, want_content: _rdf_item(elem, want_content, RSS09_NS),
+    f'{ATOM_NS}entry': _atom_item,
+}
+
+
+def _channel(elem, ns=''):
+    return {'title': (elem.findtext(f'{ns}title') or '').strip(),
+            'link': (elem.findtext(f'{ns}link') or '').strip()}
+
+
+# Channel element tag -> its title and site link. The channel ends after its
+# items in RSS 2.0 and Atom, so these arrive once the whole feed is read.
+CHANNEL_BUILDERS = {
+    'channel': _channel,
+    f'{RSS1_NS}channel': lambda elem: _channel(elem, RSS1_NS),
+    f'{RSS09_NS}channel': lambda elem: _channel(elem, RSS09_NS),
+    f'{ATOM_NS}feed': lambda elem: {'title': _text(elem.find(ATOM_TITLE)).strip(),
+                                    'link': _atom_link(elem)},
+}
+
+
+def _iter_xml(first, chunks, want_content, meta):
+    # Only 'end' events: an element is complete when it is reported
+    parser = ET.XMLPullParser(events=('end',))
+    builders = ITEM_BUILDERS
+    chunks = iter(chunks)
+    chunk = first
+
+    while chunk is not None:
+        parser.feed(chunk)
+        for _, elem in parser.read_events():
+            build = builders.get(elem.tag)
+            if build is None:
+                if meta is not None:
+                    if elem.tag in META_TAGS and elem.text:
+                        meta[META_TAGS[elem.tag]] = elem.text.strip()
+                    elif elem.tag in CHANNEL_BUILDERS:
+                        meta.update(CHANNEL_BUILDERS[elem.tag](elem))
+                continue
+            item = build(elem, want_content)
+            # Empty the finished item so the tree never holds more than one in full
+            elem.clear()
+            yield item
+        chunk = next(chunks, None)
+    parser.close()
+
+
+def _iter_json(first, chunks, want_content, meta):
+    import json
+
+    doc = json.loads(first + b''.join(chunks))
+    if meta is not None:
+        meta.update(title=(doc.get('title') or '').strip(), link=doc.get('home_page_url') or '')
+    for entry in doc.get('items') or []:
+        content = None
+        if want_content:
+            content = entry.get('content_html') or entry.get('content_text')
+        yield FeedItem(
+            title=entry.get('title') or '',
+            link=entry.get('url') or entry.get('external_url') or '',
+            guid=str(entry.get('id') or ''),
+            published=entry.get('date_published') or entry.get('date_modified') or '',
+            summary=entry.get('summary') or entry.get('content_text') or '',
+            content=content,
+        )
+
+
+def iter_items(chunks, content=True, meta=None):
+    """Yield a FeedItem for each entry of an RSS 2.0, Atom, RDF or JSON feed.
+
+    `chunks` is any iterable of bytes (e.g. resp.iter_content). XML is parsed
+    incrementally: each entry is yielded as soon as it is complete and then
+    emptied, and breaking out of the loop stops reading
+    `chunks` - and with it the network. JSON Feed has to be read whole.
+    Pass content=False to skip full article bodies. A `meta` dict receives
+    channel hints (ttl, update_period, update_frequency) as they are parsed,
+    and the channel's `title` and site `link` when the channel is complete.
+    """
+    chunks = iter(chunks)
+    first = b''
+    for chunk in chunks:
+        first += chunk
+        if first.strip():
+            break
+    if not first.strip():
+        return
+
+    if first.lstrip()[:1] == b'{':
+        yield from _iter_json(first, chunks, content, meta)
+    else:
+        yield from _iter_xml(first, chunks, content, meta)
+
+
+def looks_like_feed(content_type, head):
+    """Cheap sniff of a response's Content-Type and first bytes"""
+    content_type = content_type.lower()
+    if any(t in content_type for t in ('xml', 'rss', 'atom', 'feed+json')):
+        return True
+    head = head.lstrip()
+    if head.startswith(b'<?xml') or b'<rss' in head or b'<feed' in head or b'<rdf:RDF' in head:
+        return True
+    return head.startswith(b'{') and b'jsonfeed.org' in head
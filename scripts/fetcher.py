@@ -0,0 +1,530 @@
+"""
+RSS Agent HTTP layer - conditional GET backed by a persistent validator cache,
+and an asyncio fetch engine shared by check, fetch and digest
+"""
+
+import hashlib
+import json
+import os
+import threading
+import time
+from collections import Counter
+
+from locking import file_lock
+
+USER_AGENT = 'OpenClaw-RSS-Agent/1.0'
+DEFAULT_CONCURRENCY = 50
+DEFAULT_PER_HOST = 4
+DEFAULT_HOST_RATE = 2.0      # requests per second to one host
+THROTTLE_DELAY = 10          # pause when a 429 carries no Retry-After
+THROTTLE_RETRIES = 2
+MAX_THROTTLE_WAIT = 60       # longer Retry-After defers the feed to the next run
+
+
+class ValidatorCache:
+    """Per-feed ETag/Last-Modified/body-hash store, kept next to the feeds file.
+
+    Entries are grouped by scope (the command that consumed the response), so a
+    `fetch` never hides items from the next `digest` and vice versa. New
+    validators are held back until confirm(): a body that failed to download
+    or parse must not come back as 304 Not Modified next time. An entry's
+    `hash` is the SHA-1 of the body its validators belong to, as kept by
+    the body cache; None when no copy of that body was kept. save() applies
+    this process's confirms and forgets to the file as it is on disk, under
+    its lock, so overlapping runs keep each other's entries.
+    """
+
+    def __init__(self, path, scope='default'):
+        self.path = path
+        self.scope = scope
+        self.lock = threading.Lock()
+        self.pending = {}
+        # url -> confirmed entry, or None once forgotten, since loading
+        self.changed = {}
+        self.stats = {
+            'requests': 0,
+            'not_modified': 0,
+            'unchanged': 0,
+            'bytes_downloaded': 0,
+            'bytes_saved': 0,
+        }
+        self.data = self._load()
+
+    def _load(self):
+        try:
+            with open(self.path, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+            return data if isinstance(data, dict) else {}
+        except (OSError, ValueError):
+            return {}
+
+    def _entries(self):
+        return self.data.setdefault(self.scope, {})
+
+    def request_headers(self, url):
+        """Conditional headers for a previously seen URL"""
+        entry = self._entries().get(url)
+        headers = {}
+        if entry:
+            if entry.get('etag'):
+                headers['If-None-Match'] = entry['etag']
+            if entry.get('last_modified'):
+                headers['If-Modified-Since'] = entry['last_modified']
+        return headers
+
+    def record(self, url, resp, body=None):
+        """Record a response; return True if it may contain new items.
+
+        With the full `body` an identical download also counts as unchanged;
+        streamed responses (no body) only refresh the validators, and get
+        their hash from body_stored(). Either way they are kept only once
+        the caller confirm()s the URL.
+        """
+        with self.lock:
+            self.stats['requests'] += 1
+            entries = self._entries()
+            entry = entries.get(url) or {}
+
+            if resp.status_code == 304:
+                self.stats['not_modified'] += 1
+                self.stats['bytes_saved'] += entry.get('length', 0)
+                return False
+
+            # A 206 is `check` reading the start of the feed: keep its validators
+            if resp.status_code not in (200, 206):
+                return True
+
+            changed = True
+            digest = None
+            length = entry.get('length', 0)
+            if body is not None:
+                digest = hashlib.sha1(body).hexdigest()
+                length = len(body)
+                self.stats['bytes_downloaded'] += length
+                changed = digest != entry.get('hash')
+                if not changed:
+                    self.stats['unchanged'] += 1
+            elif full_length(resp) is not None:
+                length = full_length(resp)
+
+            self.pending[url] = {
+                'etag': resp.headers.get('ETag'),
+                'last_modified': resp.headers.get('Last-Modified'),
+                'hash': digest,
+                'length': length,
+            }
+            return changed
+
+    def body_stored(self, url, digest):
+        """BodyCache.store() callback: the body of url's last response was kept as `digest`"""
+        with self.lock:
+            entry = self.pending.get(url)
+            if entry is not None:
+                entry['hash'] = digest
+
+    def body_hash(self, url):
+        """SHA-1 of the body url's validators belong to, or None if no copy of it was kept"""
+        entry = self._entries().get(url)
+        return entry.get('hash') if entry else None
+
+    def confirm(self, url, stored_only=False):
+        """Keep the validators of the last response for `url`: its body was read and parsed.
+
+        With `stored_only` they are kept only if the body cache kept that
+        body too; otherwise the URL is forgotten, as a 304 would then point
+        at a copy that does not exist.
+        """
+        with self.lock:
+            entry = self.pending.pop(url, None)
+        if entry is None:
+            return
+        if stored_only and entry['hash'] is None:
+            self.forget(url)
+            return
+        with self.lock:
+            self._entries()[url] = entry
+            self.changed[url] = entry
+
+    def forget(self, url):
+        """Drop everything known about `url`, so the next request is unconditional"""
+        with self.lock:
+            self.pending.pop(url, None)
+            self._entries().pop(url, None)
+            # Also dropped from the file, even if another process wrote it meanwhile
+            self.changed[url] = None
+
+    def count_bytes(self, n):
+        """Account for bytes read from a streamed response"""
+        with self.lock:
+            self.stats['bytes_downloaded'] += n
+
+    def save(self):
+        """Write the entries confirmed or forgotten since loading, over whatever others wrote meanwhile"""
+        if not self.changed:
+            return
+        os.makedirs(os.path.dirname(self.path) or '.', exist_ok=True)
+        with file_lock(self.path):
+            with self.lock:
+                data = self._load()
+                entries = data.setdefault(self.scope, {})
+                for url, entry in self.changed.items():
+                    if entry is None:
+                        entries.pop(url, None)
+                    else:
+                        entries[url] = entry
+                tmp = f"{self.path}.{os.getpid()}.tmp"
+                with open(tmp, 'w', encoding='utf-8') as f:
+                    json.dump(data, f)
+                os.replace(tmp, self.path)
+                self.data = data
+                self.changed = {}
+
+    def summary(self):
+        """One-line report of what the cache saved"""
+        s = self.stats
+        saved = s['not_modified'] + s['unchanged']
+        return (f"💾 Cache: {saved}/{s['requests']} feeds unchanged "
+                f"({s['not_modified']} not modified), "
+                f"{format_bytes(s['bytes_saved'])} saved, "
+                f"{format_bytes(s['bytes_downloaded'])} downloaded")
+
+
+def format_bytes(n):
+    """Human readable byte count"""
+    for unit in ('B', 'KB', 'MB'):
+        if n < 1024:
+            return f"{n:.0f} {unit}" if unit == 'B' else f"{n:.1f} {unit}"
+        n /= 1024
+    return f"{n:.1f} GB"
+
+
+def full_length(resp):
+    """Size of the whole body from Content-Length, or Content-Range for a 206; None if unknown"""
+    if resp.status_code == 206:
+        total = resp.headers.get('Content-Range', '').rpartition('/')[2]
+        return int(total) if total.isdigit() else None
+    length = resp.headers.get('Content-Length', '')
+    return int(length) if length.isdigit() else None
+
+
+def retry_after(headers, now=None):
+    """Seconds to wait from a Retry-After header (delta-seconds or HTTP-date), or None"""
+    value = (headers.get('Retry-After') or '').strip()
+    if not value:
+        return None
+    if value.isdigit():
+        return int(value)
+    from email.utils import parsedate_to_datetime
+    try:
+        return max(0, parsedate_to_datetime(value).timestamp() - (now or time.time()))
+    except (TypeError, ValueError):
+        return None
+
+
+class Throttled(Exception):
+    """The server answered 429 (or 503 with Retry-After): slow down"""
+
+    def __init__(self, url, status, headers):
+        self.url = url
+        self.status = status
+        self.headers = headers
+        wait = retry_after(headers)
+        self.wait = THROTTLE_DELAY if wait is None else wait
+        super().__init__(f"HTTP {status}, rate limited (retry in {self.wait:.0f}s)")
+
+
+def permanent_url(resp):
+    """Where a feed has moved for good: the URL reached through the permanent
+    redirects (301, 308) at the start of resp.history, or None"""
+    moved = None
+    for hop, after in zip(resp.history, resp.history[1:] + [resp]):
+        if hop.status_code not in (301, 308):
+            break
+        moved = after.url
+    return moved
+
+
+def is_throttled(resp):
+    return resp.status_code == 429 or (resp.status_code == 503 and 'Retry-After' in resp.headers)
+
+
+def http_get(url, timeout=10, cache=None, session=None, stream=False, headers=None):
+    """GET a feed, conditionally when a validator cache is given.
+
+    Returns (resp, changed). `changed` is False for a 304 or a body identical
+    to the last one seen, in which case the caller should skip parsing.
+    With `stream` the body is left unread; consume it through iter_body().
+    Call cache.confirm(url) once the body has been handled.
+    """
+    import requests
+    from urllib3.util.request import ACCEPT_ENCODING
+
+    # Every coding urllib3 can decode here: gzip and deflate, plus br and zstd
+    # when the brotli / zstandard modules are installed
+    headers = {'User-Agent': USER_AGENT, 'Accept-Encoding': ACCEPT_ENCODING, **(headers or {})}
+    if cache is not None:
+        headers.update(cache.request_headers(url))
+
+    resp = (session or requests).get(url, timeout=timeout, headers=headers, stream=stream)
+    if cache is None:
+        return resp, resp.status_code != 304
+    return resp, cache.record(url, resp, None if stream else resp.content)
+
+
+def iter_body(resp, cache=None, chunk_size=16384):
+    """Yield a streamed response body in chunks.
+
+    Closing the generator early (or breaking out of a consumer that is
+    closed) drops the connection instead of draining the rest of the body.
+    """
+    total = 0
+    try:
+        for chunk in resp.iter_content(chunk_size):
+            total += len(chunk)
+            yield chunk
+    finally:
+        resp.close()
+        if cache is not None:
+            cache.count_bytes(total)
+
+
+class HostBucket:
+    """Token bucket for one host, in its virtual-scheduling form (GCRA).
+
+    Each request reserves the slot 1/rate seconds after the previous one,
+    with up to `burst` requests allowed back to back. Slots are handed out
+    in arrival order, so waiters never race for a token. A throttled
+    response pauses the host and halves the rate (once per pause); every
+    success adds back a tenth of the configured rate (AIMD), so a host that
+    pushed back is approached carefully for the rest of the run.
+    """
+
+    def __init__(self, rate, burst):
+        self.max_rate = rate
+        self.rate = rate
+        self.burst = burst
+        self.next_slot = 0.0
+        self.paused_until = 0.0
+
+    async def acquire(self):
+        import asyncio
+
+        while True:
+            now = time.monotonic()
+            start = max(now, self.paused_until, self.next_slot - (self.burst - 1) / self.rate)
+            self.next_slot = max(self.next_slot, start) + 1 / self.rate
+            if start > now:
+                await asyncio.sleep(start - now)
+            # A pause that began while we slept voids the reservation
+            if time.monotonic() >= self.paused_until:
+                return
+
+    def throttled(self, wait):
+        now = time.monotonic()
+        # Requests already in flight when the host pushed back don't halve it again
+        if now >= self.paused_until:
+            self.rate = max(self.max_rate / 16, self.rate / 2)
+        self.paused_until = max(self.paused_until, now + wait)
+        # Resume at the reduced rate without a burst
+        self.next_slot = self.paused_until + (self.burst - 1) / self.rate
+
+    def succeeded(self):
+        self.rate = min(self.max_rate, self.rate + self.max_rate / 10)
+
+
+def interleave_by_host(jobs):
+    """Round-robin (key, url) jobs across hosts so one big host cannot starve the rest"""
+    from collections import deque
+    from urllib.parse import urlparse
+
+    queues = {}
+    for key, url in jobs:
+        queues.setdefault(urlparse(url).netloc, deque()).append((key, url))
+    ordered = []
+    while queues:
+        for host in list(queues):
+            ordered.append(queues[host].popleft())
+            if not queues[host]:
+                del queues[host]
+    return ordered
+
+
+class FetchEngine:
+    """Concurrent feed fetcher.
+
+    An asyncio loop schedules requests under a global limit, a per-host
+    connection limit and a per-host token bucket; jobs are started
+    round-robin across hosts. Throttled responses (429, or 503 with
+    Retry-After) pause their host and are retried, or deferred when the
+    server asks for too long a wait; see throttle_summary(). An optional
+    metrics.Metrics gets the time each feed waited for the limits, the
+    request time, status and cache result of every response and the class
+    of every failure. The requests
+    themselves go through one pooled keep-alive session, so connections to
+    the same host are reused. requests/urllib3 only speak HTTP/1.1, so there
+    is no HTTP/2.
+    """
+
+    def __init__(self, concurrency=DEFAULT_CONCURRENCY, per_host=DEFAULT_PER_HOST,
+                 timeout=10, cache=None, stream=False, host_rate=DEFAULT_HOST_RATE, metrics=None):
+        import requests
+
+        self.concurrency = max(1, concurrency)
+        self.per_host = max(1, per_host)
+        self.timeout = timeout
+        self.cache = cache
+        self.stream = stream
+        self.host_rate = host_rate
+        self.metrics = metrics
+        # Buckets outlive a single run() so a long-running daemon stays polite
+        self.buckets = {}
+        self.throttled = Counter()
+        self.retried = 0
+        self.deferred = []
+        self.session = requests.Session()
+        self.session.headers['User-Agent'] = USER_AGENT
+        adapter = self._adapter(pool_connections=max(100, self.concurrency),
+                                pool_maxsize=self.per_host)
+        self.session.mount('http://', adapter)
+        self.session.mount('https://', adapter)
+
+    def _adapter(self, **kwargs):
+        from requests.adapters import HTTPAdapter
+        return HTTPAdapter(**kwargs)
+
+    def get(self, url):
+        """Blocking conditional GET through the pooled session"""
+        start = time.perf_counter()
+        resp, changed = http_get(url, timeout=self.timeout, cache=self.cache,
+                                 session=self.session, stream=self.stream)
+        if self.metrics is not None:
+            self.metrics.response(url, resp, changed, time.perf_counter() - start)
+        return resp, changed
+
+    def _get_and_work(self, key, url, work):
+        resp, changed = self.get(url)
+        if is_throttled(resp):
+            resp.close()
+            raise Throttled(url, resp.status_code, resp.headers)
+        if work is None:
+            return resp, changed
+        try:
+            result = work(key, resp, changed)
+        except BaseException:
+            if self.cache is not None:
+                self.cache.forget(url)
+            raise
+        if self.cache is not None:
+            self.cache.confirm(url)
+        return result
+
+    def run(self, jobs, work=None):
+        """Fetch (key, url) jobs concurrently, yielding (key, result, error) as each completes.
+
+        `work(key, resp, changed)` runs on a worker thread right after the
+        response arrives (e.g. parsing) and its return value becomes `result`;
+        the new validators are kept only if it returns, with the hash of the
+        body if it handed one to ValidatorCache.body_stored(). Without it
+        `result` is the (resp, changed) pair and confirming is up to the caller. It runs inside the
+        concurrency limits because with `stream` it is what reads the body. Results are handed
+        back on the calling thread, so callers may touch non-thread-safe
+        state such as SQLite connections. A feed that stays throttled comes
+        back with a Throttled error.
+        """
+        import asyncio
+        import queue
+
+        results = queue.Queue()
+        done = object()
+        self.throttled = Counter()
+        self.retried = 0
+        self.deferred = []
+
+        def runner():
+            try:
+                asyncio.run(self._run_all(jobs, work, results))
+            finally:
+                results.put(done)
+
+        thread = threading.Thread(target=runner, daemon=True)
+        thread.start()
+        while True:
+            entry = results.get()
+            if entry is done:
+                break
+            yield entry
+        thread.join()
+
+    async def _run_all(self, jobs, work, results):
+        import asyncio
+        from collections import defaultdict
+        from concurrent.futures import ThreadPoolExecutor
+        from urllib.parse import urlparse
+
+        loop = asyncio.get_running_loop()
+        executor = ThreadPoolExecutor(max_workers=self.concurrency)
+        global_limit = asyncio.Semaphore(self.concurrency)
+        host_limits = defaultdict(lambda: asyncio.Semaphore(self.per_host))
+
+        async def one(key, url):
+            host = urlparse(url).netloc
+            bucket = None
+            if self.host_rate > 0:
+                bucket = self.buckets.setdefault(host, HostBucket(self.host_rate, self.per_host))
+            for attempt in range(THROTTLE_RETRIES + 1):
+                queued = time.perf_counter()
+                try:
+                    # Take the host slot and token first so a busy host cannot hold global slots
+                    async with host_limits[host]:
+                        if bucket is not None:
+                            await bucket.acquire()
+                        async with global_limit:
+                            if self.metrics is not None:
+                                self.metrics.record(url, 'wait', time.perf_counter() - queued)
+                            result = await loop.run_in_executor(
+                                executor, self._get_and_work, key, url, work)
+                except Throttled as e:
+                    self.throttled[host] += 1
+                    if bucket is not None:
+                        bucket.throttled(e.wait)
+                    if attempt < THROTTLE_RETRIES and e.wait <= MAX_THROTTLE_WAIT:
+                        self.retried += 1
+                        if bucket is None:
+                            await asyncio.sleep(e.wait)
+                        continue
+                    self.deferred.append(url)
+                    self._failed(url, e)
+                    results.put((key, None, e))
+                    return
+                except Exception as e:
+                    self._failed(url, e)
+                    results.put((key, None, e))
+                    return
+                if bucket is not None:
+                    bucket.succeeded()
+                results.put((key, result, None))
+                return
+
+        try:
+            await asyncio.gather(*(one(key, url) for key, url in interleave_by_host(jobs)))
+        finally:
+            executor.shutdown(wait=False)
+
+    def _failed(self, url, error):
+        if self.metrics is not None:
+            self.metrics.error(url, error)
+
+    def throttle_summary(self):
+        """One-line report of rate limiting during the last run, or None"""
+        if not self.throttled:
+            return None
+        hosts = ', '.join(f"{host} ×{n}" for host, n in self.throttled.most_common(3))
+        more = len(self.throttled) - 3
+        if more > 0:
+            hosts += f", +{more} more"
+        return (f"🐢 Rate limited {sum(self.throttled.values())} times by "
+                f"{len(self.throttled)} host(s) ({hosts}): "
+                f"{self.retried} retried, {len(self.deferred)} deferred")
+
+    def close(self):
+        self.session.close()
@@ -0,0 +1,106 @@
+"""
+RSS Agent feed health - per-feed success/failure history and quarantine of dead feeds
+"""
+
+import json
+import os
+import threading
+import time
+
+from locking import file_lock
+
+# Results kept per feed
+HISTORY = 20
+# Consecutive failures after which digest stops fetching a feed on every run
+QUARANTINE_AFTER = 3
+# First quarantine lasts this long, doubling with every failed retry up to MAX_QUARANTINE
+BASE_QUARANTINE = 3600
+MAX_QUARANTINE = 7 * 86400
+
+
+class FeedHealth:
+    """Recent results of every feed URL, kept in a JSON file.
+
+    Each feed has its last HISTORY results as [time, ok, latency ms or
+    None, error or None], its current run of failures and, once that run
+    reaches quarantine_after, the time before which it is not fetched
+    again. Each failed retry doubles the quarantine, from BASE_QUARANTINE
+    up to MAX_QUARANTINE, and one success clears it. save() merges with
+    what other processes wrote, feed by feed, keeping the newest result.
+    """
+
+    def __init__(self, path, quarantine_after=QUARANTINE_AFTER):
+        self.path = path
+        self.quarantine_after = quarantine_after
+        self.lock = threading.Lock()
+        self.changed = set()
+        self.state = self._load()
+
+    def _load(self):
+        try:
+            with open(self.path, 'r', encoding='utf-8') as f:
+                state = json.load(f)
+            return state if isinstance(state, dict) else {}
+        except (OSError, ValueError):
+            return {}
+
+    def get(self, url):
+        """A feed's entry: history, streak, retry_at, last_ok; None if never fetched"""
+        return self.state.get(url)
+
+    def retry_at(self, url, now=None):
+        """When a quarantined feed may be fetched again, or None if it is not quarantined"""
+        entry = self.state.get(url)
+        if not entry or not entry.get('retry_at'):
+            return None
+        if self.quarantine_after <= 0 or entry['streak'] < self.quarantine_after:
+            return None
+        return entry['retry_at'] if entry['retry_at'] > (now or time.time()) else None
+
+    def streak(self, url):
+        """Failures in a row"""
+        entry = self.state.get(url)
+        return entry['streak'] if entry else 0
+
+    def record(self, url, ok, seconds=None, error=None, now=None):
+        """Add a result; a failure that extends a long enough run (re)starts the quarantine"""
+        now = now or time.time()
+        latency = None if seconds is None else round(seconds * 1000)
+        with self.lock:
+            entry = self.state.setdefault(url, {'history': [], 'streak': 0, 'retry_at': None, 'last_ok': None})
+            entry['history'] = (entry['history'] + [[round(now), ok, latency, None if ok else error]])[-HISTORY:]
+            if ok:
+                entry['streak'] = 0
+                entry['retry_at'] = None
+                entry['last_ok'] = round(now)
+            else:
+                entry['streak'] += 1
+                # A run that skips nothing still keeps the backoff for the next one that does
+                over = entry['streak'] - (self.quarantine_after if self.quarantine_after > 0 else QUARANTINE_AFTER)
+                if over >= 0:
+                    entry['retry_at'] = round(now + min(MAX_QUARANTINE, BASE_QUARANTINE * 2 ** min(over, 16)))
+            self.changed.add(url)
+
+    def save(self):
+        """Write the feeds recorded since loading, over whatever others recorded meanwhile"""
+        if not self.changed:
+            return
+        os.makedirs(os.path.dirname(self.path) or '.', exist_ok=True)
+        with file_lock(self.path):
+            with self.lock:
+                disk = self._load()
+                for url in self.changed:
+                    mine = self.state[url]
+                    theirs = disk.get(url)
+                    if theirs is None or _last_time(theirs) <= _last_time(mine):
+                        disk[url] = mine
+                tmp = f"{self.path}.{os.getpid()}.tmp"
+                with open(tmp, 'w', encoding='utf-8') as f:
+                    json.dump(disk, f)
+                os.replace(tmp, self.path)
+                self.state = disk
+                self.changed = set()
+
+
+def _last_time(entry):
+    return entry['history'][-1][0] if entry.get('history') else 0
@@ -0,0 +1,162 @@
+"""
+RSS Agent HTML-to-text - streaming conversion of article HTML for terminal reading
+"""
+
+import hashlib
+from html.parser import HTMLParser
+
+DEFAULT_MAX_CHARS = 2000
+
+# Content of these is never shown
+SKIP_TAGS = {'script', 'style', 'noscript', 'template', 'iframe', 'svg', 'math',
+             'object', 'head', 'select', 'button'}
+
+# These start and end a paragraph
+BLOCK_TAGS = {'p', 'div', 'section', 'article', 'aside', 'header', 'footer', 'main',
+              'nav', 'figure', 'figcaption', 'blockquote', 'table', 'form', 'address',
+              'h1', 'h2', 'h3', 'h4', 'h5', 'h6', 'dl', 'hr', 'details', 'summary'}
+
+# These start and end a line
+LINE_TAGS = {'tr', 'dt', 'dd', 'caption'}
+
+
+class TextExtractor(HTMLParser):
+    """HTML to plain text with paragraphs, line breaks and list markers kept.
+
+    Feed it HTML in pieces; once `limit` characters of text have been
+    produced it sets `done` and ignores the rest. `truncated` is only set
+    when text is actually dropped, after which callers can stop feeding.
+    Entities are decoded exactly once (convert_charrefs).
+    """
+
+    def __init__(self, limit=None):
+        super().__init__(convert_charrefs=True)
+        self.limit = limit
+        self.parts = []
+        self.length = 0
+        self.done = False
+        self.truncated = False
+        self._skip = 0
+        self._pre = 0
+        self._lists = []
+        self._break = 0
+        self._space = False
+        self._last = '\n'
+
+    def _emit(self, s):
+        if self.limit is not None and self.length + len(s) >= self.limit:
+            if self.length + len(s) > self.limit:
+                s = s[:self.limit - self.length]
+                self.truncated = True
+            self.done = True
+        if s:
+            self.parts.append(s)
+            self.length += len(s)
+            self._last = s[-1]
+
+    def _write(self, text):
+        if self.done:
+            return
+        if self._break:
+            if self.parts:
+                self._emit('\n' * self._break)
+            self._break = 0
+        elif self._space and self._last not in ' \n':
+            self._emit(' ')
+        self._space = False
+        self._emit(text)
+
+    def _newline(self, count):
+        self._break = max(self._break, count)
+        self._space = False
+
+    def handle_starttag(self, tag, attrs):
+        if tag in SKIP_TAGS:
+            self._skip += 1
+            return
+        if self._skip:
+            return
+        if tag == 'br':
+            self._newline(1)
+        elif tag in ('ul', 'ol'):
+            self._newline(1 if self._lists else 2)
+            self._lists.append(0 if tag == 'ol' else None)
+        elif tag == 'li':
+            self._newline(1)
+            indent = '  ' * max(0, len(self._lists) - 1)
+            if self._lists and self._lists[-1] is not None:
+                self._lists[-1] += 1
+                marker = f"{self._lists[-1]}. "
+            else:
+                marker = '• '
+            self._write(indent + marker)
+        elif tag == 'pre':
+            self._newline(2)
+            self._pre += 1
+        elif tag in BLOCK_TAGS:
+            self._newline(2)
+        elif tag in LINE_TAGS:
+            self._newline(1)
+        elif tag in ('td', 'th'):
+            self._space = True
+
+    def handle_endtag(self, tag):
+        if tag in SKIP_TAGS:
+            self._skip = max(0, self._skip - 1)
+            return
+        if self._skip:
+            return
+        if tag in ('ul', 'ol'):
+            if self._lists:
+                self._lists.pop()
+            self._newline(1 if self._lists else 2)
+        elif tag == 'li' or tag in LINE_TAGS:
+            self._newline(1)
+        elif tag == 'pre':
+            self._pre = max(0, self._pre - 1)
+            self._newline(2)
+        elif tag in BLOCK_TAGS:
+            self._newline(2)
+
+    def handle_data(self, data):
+        if self._skip:
+            return
+        if self.done:
+            # Text that exactly filled the budget is only cut short if more follows
+            self.truncated = self.truncated or not data.isspace()
+            return
+        if self._pre:
+            self._write(data)
+            return
+        words = data.split()
+        if not words:
+            self._space = self._space or bool(data)
+            return
+        if data[0].isspace():
+            self._space = True
+        self._write(' '.join(words))
+        self._space = data[-1].isspace()
+
+    def text(self):
+        return ''.join(self.parts).rstrip()
+
+
+def html_to_text(html, limit=DEFAULT_MAX_CHARS, chunk_size=8192):
+    """Convert HTML to text, stopping after `limit` characters (None = all).
+
+    Returns (text, truncated). The input is parsed a chunk at a time, so a
+    long article costs no more than the part that fits in the budget.
+    """
+    parser = TextExtractor(limit)
+    for i in range(0, len(html), chunk_size):
+        parser.feed(html[i:i + chunk_size])
+        if parser.truncated:
+            break
+    else:
+        parser.close()
+    return parser.text(), parser.truncated
+
+
+def text_key(html, limit):
+    """Cache key for the text of an article: hash of its HTML and the budget"""
+    return hashlib.sha1(f"{limit}\n{html}".encode('utf-8')).hexdigest()
@@ -0,0 +1,86 @@
+"""
+RSS Agent item store - SQLite record of every item already seen, and of
+article text already converted from HTML
+"""
+
+import hashlib
+import sqlite3
+from datetime import datetime, timezone
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS items (
+    id TEXT PRIMARY KEY,
+    feed_url TEXT NOT NULL,
+    title TEXT,
+    link TEXT,
+    published TEXT,
+    first_seen TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS items_feed ON items (feed_url);
+CREATE TABLE IF NOT EXISTS texts (
+    key TEXT PRIMARY KEY,
+    text TEXT NOT NULL,
+    truncated INTEGER NOT NULL,
+    created TEXT NOT NULL
+);
+"""
+
+
+def item_key(feed_url, guid=None, link=None, title=None):
+    """Stable item id: hash of the feed URL plus GUID, falling back to link, then title"""
+    ident = guid or link or title or ''
+    return hashlib.sha1(f"{feed_url}\n{ident}".encode('utf-8')).hexdigest()
+
+
+class ItemStore:
+    """Seen-item index keyed by GUID/link hash"""
+
+    def __init__(self, path):
+        self.path = path
+        # WAL lets readers run alongside a writer; concurrent writers wait on
+        # SQLite's own lock instead of failing with "database is locked"
+        self.conn = sqlite3.connect(path, timeout=30)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.executescript(SCHEMA)
+
+    def unseen(self, items):
+        """Return the items whose id is not stored yet (items need an 'id' key)"""
+        if not items:
+            return []
+        ids = [item['id'] for item in items]
+        seen = set()
+        # Stay well below SQLite's host parameter limit
+        for i in range(0, len(ids), 500):
+            chunk = ids[i:i + 500]
+            marks = ','.join('?' * len(chunk))
+            rows = self.conn.execute(f"SELECT id FROM items WHERE id IN ({marks})", chunk)
+            seen.update(row[0] for row in rows)
+        return [item for item in items if item['id'] not in seen]
+
+    def add(self, feed_url, items):
+        """Mark items as seen ('date' is a POSIX timestamp or None)"""
+        now = datetime.now().isoformat(timespec='seconds')
+        rows = [
+            (item['id'], feed_url, item.get('title'), item.get('link'),
+             datetime.fromtimestamp(item['date'], timezone.utc).isoformat() if item.get('date') is not None else None,
+             now)
+            for item in items
+        ]
+        with self.conn:
+            self.conn.executemany(
+                "INSERT OR IGNORE INTO items (id, feed_url, title, link, published, first_seen) "
+                "VALUES (?, ?, ?, ?, ?, ?)", rows)
+
+    def get_text(self, key):
+        """Cached (text, truncated) for a htmltext.text_key, or None"""
+        row = self.conn.execute("SELECT text, truncated FROM texts WHERE key = ?", (key,)).fetchone()
+        return (row[0], bool(row[1])) if row else None
+
+    def put_text(self, key, text, truncated):
+        with self.conn:
+            self.conn.execute(
+                "INSERT OR REPLACE INTO texts (key, text, truncated, created) VALUES (?, ?, ?, ?)",
+                (key, text, int(truncated), datetime.now().isoformat(timespec='seconds')))
+
+    def close(self):
+        self.conn.close()
@@ -0,0 +1,30 @@
+"""
+RSS Agent file locking - advisory locks serializing writers of shared state files
+"""
+
+import os
+from contextlib import contextmanager
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+
+
+@contextmanager
+def file_lock(path):
+    """Hold an exclusive advisory lock on `path + '.lock'` for the duration of the block.
+
+    Only writers take the lock. Readers never do: writers replace files by
+    atomic rename, so a reader always sees either the old or the new version.
+    """
+    lock_path = f"{path}.lock"
+    os.makedirs(os.path.dirname(lock_path) or '.', exist_ok=True)
+    with open(lock_path, 'a') as lock_file:
+        if fcntl is not None:
+            fcntl.flock(lock_file.fileno(), fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            if fcntl is not None:
+                fcntl.flock(lock_file.fileno(), fcntl.LOCK_UN)
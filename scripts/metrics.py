@@ -0,0 +1,302 @@
+"""
+RSS Agent metrics - per-stage timings and per-feed counters behind --profile and --metrics
+"""
+
+import json
+import os
+import threading
+import time
+from collections import Counter, defaultdict
+from contextlib import contextmanager, nullcontext
+
+# Pipeline stages, in the order a feed goes through them; `wait` is time
+# queued behind the concurrency and per-host rate limits
+STAGES = ('wait', 'request', 'download', 'parse', 'dates', 'text', 'index', 'unseen', 'dedup', 'output')
+
+
+def timed(metrics, stage):
+    """metrics.timer(stage), or a no-op when metrics are off"""
+    return nullcontext() if metrics is None else metrics.timer(stage)
+
+
+class FeedClock:
+    """Times one feed's work on the thread doing it, merged into Metrics once.
+
+    Wrap the body with chunks() and per-item calls with wrap(); whatever
+    time is left when finish() is called goes to `rest` (the parser).
+    """
+
+    def __init__(self, metrics, url):
+        self.metrics = metrics
+        self.url = url
+        self.start = time.perf_counter()
+        self.seconds = defaultdict(float)
+        self.bytes = 0
+        self.items = 0
+
+    def chunks(self, chunks):
+        """Pass a body through, counting bytes and the time spent waiting for them.
+        Closing it closes `chunks` too, so stopping early still drops the download."""
+        chunks = iter(chunks)
+        try:
+            while True:
+                start = time.perf_counter()
+                try:
+                    chunk = next(chunks)
+                except StopIteration:
+                    return
+                finally:
+                    self.seconds['download'] += time.perf_counter() - start
+                self.bytes += len(chunk)
+                yield chunk
+        finally:
+            if hasattr(chunks, 'close'):
+                chunks.close()
+
+    def wrap(self, stage, fn):
+        """fn, with its running time added to `stage`"""
+        seconds = self.seconds
+
+        def timed_fn(*args, **kwargs):
+            start = time.perf_counter()
+            try:
+                return fn(*args, **kwargs)
+            finally:
+                seconds[stage] += time.perf_counter() - start
+        return timed_fn
+
+    def finish(self, rest='parse', items=0):
+        self.items += items
+        self.seconds[rest] += max(0.0, time.perf_counter() - self.start - sum(self.seconds.values()))
+        self.metrics.merge(self)
+
+
+class Metrics:
+    """Counters for one command run, or for the life of a daemon.
+
+    Stage seconds are summed over worker threads, so with concurrent
+    fetching they add up to more than the wall time. Everything is
+    cumulative, which is what Prometheus expects of counters.
+    """
+
+    def __init__(self, command):
+        self.command = command
+        self.started = time.time()
+        self.lock = threading.Lock()
+        self.stages = defaultdict(lambda: [0.0, 0])
+        self.errors = Counter()
+        self.cache = Counter()
+        self.bytes = 0
+        self.items = 0
+        self.runs = 0
+        self.feeds = {}
+
+    def _feed(self, url):
+        entry = self.feeds.get(url)
+        if entry is None:
+            entry = self.feeds[url] = {'name': None, 'status': None, 'cache': None, 'bytes': 0,
+                                       'items': 0, 'errors': 0, 'error': None,
+                                       'seconds': defaultdict(float)}
+        return entry
+
+    def _add(self, stage, seconds, calls=1):
+        entry = self.stages[stage]
+        entry[0] += seconds
+        entry[1] += calls
+
+    @contextmanager
+    def timer(self, stage):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            with self.lock:
+                self._add(stage, time.perf_counter() - start)
+
+    def record(self, url, stage, seconds):
+        """Time a feed spent in a stage"""
+        with self.lock:
+            self._add(stage, seconds)
+            self._feed(url)['seconds'][stage] += seconds
+
+    def name(self, url, name):
+        with self.lock:
+            self._feed(url)['name'] = name
+
+    def response(self, url, resp, changed, seconds):
+        """A response's headers arrived `seconds` after the request started"""
+        if resp.status_code == 304:
+            result = 'not_modified'
+        elif resp.status_code != 200:
+            result = None
+        else:
+            result = 'miss' if changed else 'unchanged'
+        with self.lock:
+            self._add('request', seconds)
+            entry = self._feed(url)
+            entry['status'] = resp.status_code
+            entry['seconds']['request'] += seconds
+            if result is not None:
+                entry['cache'] = result
+                self.cache[result] += 1
+
+    def error(self, url, error):
+        name = type(error).__name__
+        with self.lock:
+            self.errors[name] += 1
+            entry = self._feed(url)
+            entry['errors'] += 1
+            entry['error'] = name
+
+    def clock(self, url):
+        return FeedClock(self, url)
+
+    def merge(self, clock):
+        with self.lock:
+            entry = self._feed(clock.url)
+            for stage, seconds in clock.seconds.items():
+                self._add(stage, seconds)
+                entry['seconds'][stage] += seconds
+            entry['bytes'] += clock.bytes
+            entry['items'] += clock.items
+            self.bytes += clock.bytes
+            self.items += clock.items
+
+    def finish_run(self):
+        with self.lock:
+            self.runs += 1
+
+    def report(self):
+        """Everything as one JSON-ready dict"""
+        with self.lock:
+            stages = {stage: {'seconds': round(seconds, 4), 'calls': calls}
+                      for stage, (seconds, calls) in sorted(
+                          self.stages.items(), key=lambda entry: _stage_order(entry[0]))}
+            feeds = {url: dict(entry, seconds={stage: round(s, 4) for stage, s in entry['seconds'].items()})
+                     for url, entry in self.feeds.items()}
+            return {
+                'command': self.command,
+                'started': self.started,
+                'elapsed': round(time.time() - self.started, 3),
+                'runs': self.runs,
+                'stages': stages,
+                'bytes': self.bytes,
+                'items': self.items,
+                'cache': dict(self.cache),
+                'errors': dict(self.errors),
+                'feeds': feeds,
+            }
+
+    def prometheus(self):
+        """The report in the Prometheus text exposition format"""
+        report = self.report()
+        command = {'command': self.command}
+        lines = []
+
+        def metric(name, kind, help_text, samples):
+            lines.append(f"# HELP {name} {help_text}")
+            lines.append(f"# TYPE {name} {kind}")
+            for labels, value in samples:
+                lines.append(f"{name}{_labels(dict(command, **labels))} {_number(value)}")
+
+        metric('rss_stage_seconds_total', 'counter', 'Time spent in each pipeline stage, summed over workers',
+               [({'stage': stage}, entry['seconds']) for stage, entry in report['stages'].items()])
+        metric('rss_stage_calls_total', 'counter', 'Times each pipeline stage ran',
+               [({'stage': stage}, entry['calls']) for stage, entry in report['stages'].items()])
+        metric('rss_downloaded_bytes_total', 'counter', 'Feed bytes downloaded', [({}, report['bytes'])])
+        metric('rss_items_parsed_total', 'counter', 'Feed items parsed', [({}, report['items'])])
+        metric('rss_cache_responses_total', 'counter', 'Responses by validator cache result',
+               [({'result': result}, n) for result, n in sorted(report['cache'].items())])
+        metric('rss_errors_total', 'counter', 'Failed feeds by error class',
+               [({'error': error}, n) for error, n in sorted(report['errors'].items())])
+        metric('rss_runs_total', 'counter', 'Completed fetch rounds', [({}, report['runs'])])
+        metric('rss_start_time_seconds', 'gauge', 'When collection started', [({}, report['started'])])
+
+        feeds = sorted(report['feeds'].items())
+        metric('rss_feed_seconds_total', 'counter', 'Time spent on a feed by stage',
+               [({'feed': url, 'stage': stage}, s) for url, entry in feeds for stage, s in sorted(entry['seconds'].items())])
+        metric('rss_feed_downloaded_bytes_total', 'counter', 'Bytes downloaded from a feed',
+               [({'feed': url}, entry['bytes']) for url, entry in feeds])
+        metric('rss_feed_items_parsed_total', 'counter', 'Items parsed from a feed',
+               [({'feed': url}, entry['items']) for url, entry in feeds])
+        metric('rss_feed_errors_total', 'counter', 'Failed fetches of a feed',
+               [({'feed': url}, entry['errors']) for url, entry in feeds])
+        metric('rss_feed_last_status', 'gauge', 'HTTP status of the last response from a feed',
+               [({'feed': url}, entry['status']) for url, entry in feeds if entry['status'] is not None])
+        return '\n'.join(lines) + '\n'
+
+    def write(self, path):
+        """Atomically write the report to `path`: JSON for *.json, Prometheus text otherwise"""
+        text = (json.dumps(self.report(), indent=2) + '\n' if path.endswith('.json')
+                else self.prometheus())
+        tmp = f"{path}.{os.getpid()}.tmp"
+        with open(tmp, 'w', encoding='utf-8') as f:
+            f.write(text)
+        os.replace(tmp, path)
+
+    def serve(self, port, host='127.0.0.1'):
+        """Serve the Prometheus text at http://host:port/metrics from a background thread"""
+        from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+        metrics = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                if self.path.split('?')[0] != '/metrics':
+                    self.send_error(404)
+                    return
+                body = metrics.prometheus().encode('utf-8')
+                self.send_response(200)
+                self.send_header('Content-Type', 'text/plain; version=0.0.4; charset=utf-8')
+                self.send_header('Content-Length', str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, *args):
+                pass
+
+        server = ThreadingHTTPServer((host, port), Handler)
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        return server
+
+    def profile_lines(self, slowest=5):
+        """Human-readable profile for --profile"""
+        from fetcher import format_bytes
+
+        report = self.report()
+        total = sum(entry['seconds'] for entry in report['stages'].values()) or 1
+        lines = [f"⏱️ Profile: {report['elapsed']:.2f} s wall (stage times are summed over workers)",
+                 f"  {'stage':<10}{'seconds':>10}{'calls':>9}{'share':>8}"]
+        for stage, entry in report['stages'].items():
+            lines.append(f"  {stage:<10}{entry['seconds']:>10.3f}{entry['calls']:>9,}"
+                         f"{entry['seconds'] / total:>8.0%}")
+        cache = report['cache']
+        hits = cache.get('not_modified', 0) + cache.get('unchanged', 0)
+        lines.append(f"  📦 {format_bytes(report['bytes'])} downloaded, {report['items']:,} items parsed, "
+                     f"cache {hits}/{sum(cache.values())} unchanged")
+        if report['errors']:
+            lines.append("  ❗ Errors: " + ', '.join(f"{name} ×{n}" for name, n in
+                                                    Counter(report['errors']).most_common()))
+        feeds = sorted(report['feeds'].values(), key=lambda entry: sum(entry['seconds'].values()), reverse=True)
+        if feeds[:slowest]:
+            lines.append("  🐌 Slowest feeds:")
+            for entry in feeds[:slowest]:
+                parts = ', '.join(f"{stage} {s:.2f}" for stage, s in
+                                  sorted(entry['seconds'].items(), key=lambda e: _stage_order(e[0])) if s >= 0.005)
+                lines.append(f"    {sum(entry['seconds'].values()):>6.2f} s  {entry['name'] or '?'}"
+                             + (f" ({parts})" if parts else ""))
+        return lines
+
+
+def _stage_order(stage):
+    return STAGES.index(stage) if stage in STAGES else len(STAGES)
+
+
+def _number(value):
+    return str(value) if isinstance(value, int) else repr(round(value, 6))
+
+
+def _labels(labels):
+    def escape(value):
+        return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+    return '{' + ','.join(f'{key}="{escape(value)}"' for key, value in labels.items()) + '}'
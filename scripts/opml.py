@@ -0,0 +1,39 @@
+"""
+RSS Agent OPML reader - subscriptions streamed out of OPML files of any size
+"""
+
+import xml.etree.ElementTree as ET
+
+
+def iter_outlines(path):
+    """Yield a subscription dict for each outline with an xmlUrl, in file order.
+
+    The file is parsed incrementally and each outline is dropped once its
+    children are read, so memory stays flat however many feeds it lists.
+    A feed's category is the text of the folder outline it sits in. `name`
+    is the outline's text (or title) attribute and None when it has neither.
+    """
+    body = None
+    # (element, category of its children) for each outline being read
+    stack = []
+    for event, elem in ET.iterparse(path, events=('start', 'end')):
+        if elem.tag == 'body':
+            body = elem if event == 'start' else None
+            continue
+        if elem.tag != 'outline' or body is None:
+            continue
+        if event == 'start':
+            category = stack[-1][1] if stack else None
+            text = elem.get('text') or elem.get('title')
+            xml_url = elem.get('xmlUrl')
+            if xml_url:
+                yield {
+                    "name": text,
+                    "xmlUrl": xml_url,
+                    "htmlUrl": elem.get('htmlUrl'),
+                    "category": category or "Uncategorized"
+                }
+            stack.append((elem, category if xml_url else text))
+        else:
+            stack.pop()
+            (stack[-1][0] if stack else body).clear()
@@ -0,0 +1,50 @@
+"""
+RSS Agent output - human text or machine-readable JSON / NDJSON records
+"""
+
+import json
+import sys
+
+FORMATS = ('text', 'json', 'ndjson')
+
+
+class Output:
+    """Where a command sends what it reports.
+
+    `say()` is the emoji text meant for people and is dropped in machine
+    formats; `emit()` is a typed record (`{"type": ..., ...}`) and is dropped
+    in text mode. ndjson writes each record on its own line the moment it is
+    emitted, so consumers can start before the command finishes; json
+    collects the same records into one array written by close().
+    """
+
+    def __init__(self, fmt='text', stream=None):
+        self.format = fmt
+        self.stream = stream or sys.stdout
+        self.records = []
+
+    @property
+    def text(self):
+        return self.format == 'text'
+
+    def say(self, *lines):
+        if self.text:
+            for line in lines:
+                print(line, file=self.stream)
+
+    def emit(self, kind, **fields):
+        if self.text:
+            return
+        record = {'type': kind, **fields}
+        if self.format == 'ndjson':
+            self.stream.write(json.dumps(record, ensure_ascii=False) + '\n')
+            self.stream.flush()
+        else:
+            self.records.append(record)
+
+    def close(self):
+        if self.format == 'json':
+            json.dump(self.records, self.stream, ensure_ascii=False, indent=2)
+            self.stream.write('\n')
+            self.records = []
+        self.stream.flush()
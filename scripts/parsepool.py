@@ -0,0 +1,143 @@
+"""
+RSS Agent parse pool - feed documents parsed in worker processes, for digests bound by parsing
+"""
+
+import time
+from concurrent.futures import Future, ProcessPoolExecutor
+
+# Bytes of a shared document handed to the parser at a time
+PARSE_CHUNK = 64 * 1024
+# Imported once in the fork server, so a new worker starts with them loaded
+PRELOAD = ['parsepool', 'feedparse', 'feeddates', 'itemstore', 'bodycache']
+
+
+class ParsePool:
+    """Parses feed documents for a digest window in `workers` processes.
+
+    ElementTree and date parsing hold the GIL, so threads cannot parse
+    more than one feed at a time; processes can. Downloaded bodies are
+    copied once into a shared memory block that the worker maps, and
+    cached bodies are opened by the worker itself, so documents never go
+    through a pipe. Only the in-window items come back, as
+    (id, title, link, date, summary) tuples. Workers are forked from a
+    fork server where there is one, never from the process running the
+    fetch threads.
+    """
+
+    def __init__(self, workers, since_ts, keep_undated, old_items_before_stop):
+        import multiprocessing
+
+        if 'forkserver' in multiprocessing.get_all_start_methods():
+            context = multiprocessing.get_context('forkserver')
+            context.set_forkserver_preload(PRELOAD)
+        else:
+            context = multiprocessing.get_context()
+        self.executor = ProcessPoolExecutor(max(1, workers), mp_context=context)
+        self.window = (since_ts, keep_undated, old_items_before_stop)
+
+    def parse_body(self, url, chunks):
+        """Read a body to the end and parse it in a worker; returns a Future.
+
+        The result is (rows, entries parsed, {stage: seconds}, bytes).
+        """
+        from multiprocessing import shared_memory
+
+        chunks = list(chunks)
+        size = sum(len(chunk) for chunk in chunks)
+        if not size:
+            future = Future()
+            future.set_result(([], 0, {}, 0))
+            return future
+        shm = shared_memory.SharedMemory(create=True, size=size)
+        try:
+            offset = 0
+            for chunk in chunks:
+                shm.buf[offset:offset + len(chunk)] = chunk
+                offset += len(chunk)
+            del chunks
+            future = self.executor.submit(_parse_shared, shm.name, size, url, *self.window)
+        except BaseException:
+            shm.close()
+            shm.unlink()
+            raise
+
+        def release(_):
+            shm.close()
+            shm.unlink()
+        future.add_done_callback(release)
+        return future
+
+    def parse_file(self, url, path):
+        """Parse a cached body (BodyCache.locate) in a worker; returns a Future
+        of the same result as parse_body(), or of None if the file is gone"""
+        return self.executor.submit(_parse_file, path, url, *self.window)
+
+    def close(self):
+        self.executor.shutdown(cancel_futures=True)
+
+
+def window_rows(url, chunks, since_ts, keep_undated, old_items_before_stop):
+    """The items of a document dated since since_ts (undated ones with
+    keep_undated), stopping after a run of older ones like digest does"""
+    from feedparse import iter_items
+    from feeddates import DateParser
+    from itemstore import item_key
+
+    start = time.perf_counter()
+    timestamp = DateParser().timestamp
+    rows = []
+    dates = 0.0
+    parsed = 0
+    old_streak = 0
+    for entry in iter_items(chunks, content=False):
+        parsed += 1
+        before = time.perf_counter()
+        item_ts = timestamp(entry.published)
+        dates += time.perf_counter() - before
+
+        if item_ts is not None and item_ts < since_ts:
+            old_streak += 1
+            if old_streak >= old_items_before_stop:
+                break
+            continue
+        old_streak = 0
+
+        if item_ts is not None or keep_undated:
+            rows.append((item_key(url, entry.guid, entry.link, entry.title),
+                         entry.title, entry.link, item_ts, entry.summary))
+    seconds = {'dates': dates, 'parse': time.perf_counter() - start - dates}
+    return rows, parsed, seconds
+
+
+def _parse_shared(name, size, url, *window):
+    from multiprocessing import shared_memory
+
+    shm = shared_memory.SharedMemory(name)
+    try:
+        with shm.buf[:size] as view:
+            chunks = (bytes(view[i:i + PARSE_CHUNK]) for i in range(0, size, PARSE_CHUNK))
+            rows, parsed, seconds = window_rows(url, chunks, *window)
+            chunks.close()
+        return rows, parsed, seconds, size
+    finally:
+        shm.close()
+
+
+def _parse_file(path, url, *window):
+    from bodycache import read_object
+
+    chunks = read_object(path)
+    if chunks is None:
+        return None
+    size = 0
+
+    def counted():
+        nonlocal size
+        for chunk in chunks:
+            size += len(chunk)
+            yield chunk
+    try:
+        rows, parsed, seconds = window_rows(url, counted(), *window)
+    finally:
+        chunks.close()
+    return rows, parsed, seconds, size
@@ -0,0 +1,295 @@
+"""
+RSS Agent feed probe - timed, ranged requests behind `check`
+"""
+
+import socket
+import threading
+import time
+
+from requests.adapters import HTTPAdapter
+from urllib3.connection import HTTPConnection, HTTPSConnection
+from urllib3.connectionpool import HTTPConnectionPool, HTTPSConnectionPool
+from urllib3.exceptions import ConnectTimeoutError, NameResolutionError, NewConnectionError
+from urllib3.util.connection import allowed_gai_family
+
+from feedparse import iter_items, looks_like_feed
+from fetcher import FetchEngine, format_bytes, full_length, http_get, iter_body
+
+# Enough of a feed to sniff; a Range request asks for no more than this
+SNIFF_BYTES = 8192
+# A server that ignores Range and sends a body up to this size is read to the
+# end, keeping the connection alive; a bigger one is dropped after the sniff
+DRAIN_BYTES = 64 * 1024
+
+# Timing of the request running on this thread: {'start': t, 'hops': [hop, ...]}
+_local = threading.local()
+
+
+def _current_hop():
+    timing = getattr(_local, 'timing', None)
+    return timing['hops'][-1] if timing and timing['hops'] else None
+
+
+class _TimedConnection:
+    """Records DNS and TCP connect time of new connections into the current hop"""
+
+    def _new_conn(self):
+        hop = _current_hop()
+        if hop is None:
+            return super()._new_conn()
+        start = time.perf_counter()
+        try:
+            infos = socket.getaddrinfo(self._dns_host, self.port, allowed_gai_family(), socket.SOCK_STREAM)
+        except socket.gaierror as e:
+            raise NameResolutionError(self.host, self, e) from e
+        resolved = time.perf_counter()
+        hop['dns'] = resolved - start
+
+        # Connect to the addresses just resolved rather than looking the name up again
+        dns_host = self._dns_host
+        error = None
+        try:
+            for address in dict.fromkeys(info[4][0] for info in infos):
+                self._dns_host = address
+                try:
+                    sock = super()._new_conn()
+                    break
+                except (ConnectTimeoutError, NewConnectionError) as e:
+                    error = e
+            else:
+                raise error
+        finally:
+            self._dns_host = dns_host
+        hop['connect'] = time.perf_counter() - resolved
+        hop['reused'] = False
+        return sock
+
+
+class TimedHTTPConnection(_TimedConnection, HTTPConnection):
+    pass
+
+
+class TimedHTTPSConnection(_TimedConnection, HTTPSConnection):
+    def connect(self):
+        start = time.perf_counter()
+        super().connect()
+        hop = _current_hop()
+        if hop is not None:
+            hop['tls'] = time.perf_counter() - start - hop['dns'] - hop['connect']
+
+
+class TimedHTTPConnectionPool(HTTPConnectionPool):
+    ConnectionCls = TimedHTTPConnection
+
+
+class TimedHTTPSConnectionPool(HTTPSConnectionPool):
+    ConnectionCls = TimedHTTPSConnection
+
+
+class TimedAdapter(HTTPAdapter):
+    """HTTPAdapter that times every hop (request or redirect) of a probe"""
+
+    def init_poolmanager(self, *args, **kwargs):
+        super().init_poolmanager(*args, **kwargs)
+        self.poolmanager.pool_classes_by_scheme = {
+            'http': TimedHTTPConnectionPool,
+            'https': TimedHTTPSConnectionPool,
+        }
+
+    def send(self, request, **kwargs):
+        timing = getattr(_local, 'timing', None)
+        if timing is None:
+            return super().send(request, **kwargs)
+        hop = {'start': time.perf_counter(), 'dns': 0.0, 'connect': 0.0, 'tls': 0.0, 'reused': True}
+        timing['hops'].append(hop)
+        resp = super().send(request, **kwargs)
+        hop['headers'] = time.perf_counter()
+        return resp
+
+
+def timing_report(timing, end=None):
+    """Milliseconds spent in each phase of a probe.
+
+    dns/connect/tls/ttfb belong to the last hop (0 on a reused connection);
+    `redirect` is everything before it, `transfer` the body read after it.
+    ttfb and transfer are None when no response arrived.
+    """
+    end = end or time.perf_counter()
+    ms = lambda seconds: round(max(0.0, seconds) * 1000, 1)
+    report = {'dns': 0.0, 'connect': 0.0, 'tls': 0.0, 'ttfb': None, 'redirect': 0.0,
+              'transfer': None, 'total': ms(end - timing['start'])}
+    hops = timing['hops']
+    if not hops:
+        return report
+    hop = hops[-1]
+    report.update(dns=ms(hop['dns']), connect=ms(hop['connect']), tls=ms(hop['tls']))
+    if len(hops) > 1:
+        report['redirect'] = ms(hop['start'] - timing['start'])
+    if 'headers' in hop:
+        setup = hop['dns'] + hop['connect'] + hop['tls']
+        report.update(ttfb=ms(hop['headers'] - hop['start'] - setup),
+                      transfer=ms(end - hop['headers']))
+    return report
+
+
+def timing_line(report):
+    """One-line breakdown of a probe report, for -v"""
+    t = report['timings']
+    parts = [f"{name} {t[name]:.0f}" for name in ('redirect', 'dns', 'connect', 'tls', 'ttfb', 'transfer')
+             if t[name] or (name == 'ttfb' and t[name] is not None)]
+    parts.append(f"total {t['total']:.0f} ms")
+    if report.get('reused'):
+        parts.append("reused connection")
+    if report.get('bytes') is not None:
+        parts.append(f"{format_bytes(report['bytes'])} read")
+        if report.get('size') is not None and report['size'] != report['bytes']:
+            parts[-1] += f", feed is {format_bytes(report['size'])}"
+    return ' · '.join(parts)
+
+
+def describe_error(error):
+    """Short reason a probe failed, naming the phase where it could"""
+    import requests
+
+    if isinstance(error, requests.exceptions.ConnectTimeout):
+        return "Connect timed out"
+    if isinstance(error, requests.exceptions.ReadTimeout):
+        return "Timed out waiting for the server"
+    if isinstance(error, requests.exceptions.SSLError):
+        return "TLS handshake failed"
+    if isinstance(error, requests.exceptions.ConnectionError):
+        reason = getattr(error.args[0], 'reason', None) if error.args else None
+        if isinstance(reason, NameResolutionError):
+            return "DNS lookup failed"
+        if isinstance(reason, NewConnectionError):
+            cause = reason.__cause__
+            return f"Connect failed: {cause.strerror}" if getattr(cause, 'strerror', None) else "Connect failed"
+    return str(error)
+
+
+class ProbeEngine(FetchEngine):
+    """FetchEngine for `check`: one timed, ranged GET per feed.
+
+    Only the first SNIFF_BYTES of a feed are requested; its headers and
+    first bytes are usually enough to tell a feed from an error page, and
+    the feed is parsed only when they are not. Each result is a report
+    dict with the HTTP status, redirect chain, bytes read, full size when
+    the server tells it, and per-phase timings (see timing_report). A
+    failed request carries the timings it got to as `error.timings`.
+    """
+
+    def __init__(self, *args, **kwargs):
+        kwargs['stream'] = True
+        super().__init__(*args, **kwargs)
+
+    def _adapter(self, **kwargs):
+        return TimedAdapter(**kwargs)
+
+    def get(self, url):
+        return http_get(url, timeout=self.timeout, cache=self.cache, session=self.session,
+                        stream=True, headers={'Range': f'bytes=0-{SNIFF_BYTES - 1}'})
+
+    def _get_and_work(self, key, url, work):
+        _local.timing = {'start': time.perf_counter(), 'hops': []}
+        try:
+            report = super()._get_and_work(key, url, work)
+            # A feed that is down or invalid must not be "not modified" next time
+            if report['status'] != 'ok' and self.cache is not None:
+                self.cache.forget(url)
+            return report
+        except Exception as e:
+            e.timings = timing_report(_local.timing)
+            raise
+        finally:
+            _local.timing = None
+
+    def run(self, jobs):
+        """Probe (key, url) jobs concurrently, yielding (key, report, error)"""
+        return super().run(jobs, self._inspect)
+
+    def _inspect(self, key, resp, changed):
+        hops = resp.history + [resp]
+        report = {
+            'http_status': resp.status_code,
+            'content_type': resp.headers.get('Content-Type'),
+            'url': resp.url,
+            'redirects': [{'status': r.status_code, 'url': r.url, 'location': after.url}
+                          for r, after in zip(hops, hops[1:])],
+            'reused': bool(_local.timing['hops']) and _local.timing['hops'][-1]['reused'],
+            'bytes': 0,
+            'size': full_length(resp),
+            'parsed': False,
+        }
+        if resp.status_code == 304:
+            resp.close()
+            report.update(status='ok', detail='not modified')
+        elif resp.status_code == 416:
+            # Range not satisfiable: an empty body, or a server that dislikes ranges
+            resp.close()
+            self._parse(report, resp.url)
+        elif resp.status_code not in (200, 206):
+            resp.close()
+            report.update(status='failed', detail=f"HTTP {resp.status_code}")
+        else:
+            head, complete = self._sniff(resp, report)
+            if looks_like_feed(report['content_type'] or '', head[:500]):
+                report.update(status='ok', detail=None)
+            elif complete:
+                self._parse(report, resp.url, head)
+            else:
+                self._parse(report, resp.url)
+        report['timings'] = timing_report(_local.timing)
+        return report
+
+    def _sniff(self, resp, report):
+        """First bytes of the body, and whether they are all of it"""
+        size = report['size']
+        # A range, or a small body, is read to the end so the connection goes back to the pool
+        drain = resp.status_code == 206 or (size is not None and size <= DRAIN_BYTES)
+        head = b''
+        body = iter_body(resp, self.cache)
+        for chunk in body:
+            head += chunk
+            if len(head) >= SNIFF_BYTES and not drain:
+                body.close()
+                complete = False
+                break
+        else:
+            complete = resp.status_code == 200 or (size is not None and len(head) >= size)
+        report['bytes'] = len(head)
+        return head, complete
+
+    def _parse(self, report, url, body=None):
+        """Settle a response the sniff could not: does it yield a feed item?"""
+        report['parsed'] = True
+        resp = None
+        if body is None:
+            # Counted as transfer time of the probe, not as a hop of its own
+            timing, _local.timing = _local.timing, None
+            try:
+                resp, _ = http_get(url, timeout=self.timeout, session=self.session, stream=True)
+            finally:
+                _local.timing = timing
+            if resp.status_code != 200:
+                resp.close()
+                report.update(status='failed', detail=f"HTTP {resp.status_code}")
+                return
+            report['size'] = full_length(resp)
+        chunks = [body] if resp is None else iter_body(resp, self.cache)
+        try:
+            item = next(iter_items(_counted(chunks, report) if resp else chunks, content=False), None)
+        except Exception:
+            item = None
+        finally:
+            if resp is not None:
+                chunks.close()
+        if item is None:
+            report.update(status='invalid', detail='Invalid RSS/Atom')
+        else:
+            report.update(status='ok', detail=f"served as {report['content_type'] or 'unknown type'}")
+
+
+def _counted(chunks, report):
+    for chunk in chunks:
+        report['bytes'] += len(chunk)
+        yield chunk
@@ -0,0 +1,155 @@
+"""
+RSS Agent polling scheduler - per-feed adaptive intervals in a priority queue
+"""
+
+import heapq
+import json
+import os
+import time
+
+from fetcher import retry_after
+
+MIN_INTERVAL = 5 * 60
+MAX_INTERVAL = 24 * 3600
+DEFAULT_INTERVAL = 3600
+MAX_BACKOFF = 24 * 3600
+
+# sy:updatePeriod in seconds
+UPDATE_PERIODS = {
+    'hourly': 3600,
+    'daily': 86400,
+    'weekly': 7 * 86400,
+    'monthly': 30 * 86400,
+    'yearly': 365 * 86400,
+}
+
+
+def learned_interval(timestamps):
+    """Median gap between consecutive item timestamps, or None with fewer than two"""
+    stamps = sorted(set(timestamps), reverse=True)
+    gaps = sorted(a - b for a, b in zip(stamps, stamps[1:]))
+    if not gaps:
+        return None
+    return gaps[len(gaps) // 2]
+
+
+def hinted_interval(meta, headers):
+    """Longest poll interval requested by the publisher (<ttl>, sy:*, Cache-Control)"""
+    hints = []
+    try:
+        if meta.get('ttl'):
+            hints.append(int(meta['ttl']) * 60)
+        if meta.get('update_period'):
+            period = UPDATE_PERIODS.get(meta['update_period'].lower())
+            frequency = int(meta.get('update_frequency') or 1)
+            if period and frequency > 0:
+                hints.append(period // frequency)
+    except ValueError:
+        pass
+
+    for directive in headers.get('Cache-Control', '').split(','):
+        name, _, value = directive.strip().partition('=')
+        if name.lower() == 'max-age' and value.isdigit():
+            hints.append(int(value))
+    return max(hints) if hints else None
+
+
+class Scheduler:
+    """Priority queue of feeds keyed by next poll time, persisted between runs.
+
+    Each feed's interval follows how often it actually publishes, never
+    polling more often than the feed or server asks, and errors back off
+    exponentially (or as long as Retry-After says).
+    """
+
+    def __init__(self, path, min_interval=MIN_INTERVAL, max_interval=MAX_INTERVAL):
+        self.path = path
+        self.min_interval = min_interval
+        self.max_interval = max_interval
+        self.state = {}
+        self.heap = []
+        if os.path.exists(path):
+            try:
+                with open(path, 'r', encoding='utf-8') as f:
+                    self.state = json.load(f)
+            except (OSError, ValueError):
+                self.state = {}
+
+    def sync(self, urls, now=None):
+        """Track exactly these feed URLs; new ones are due immediately"""
+        now = now or time.time()
+        urls = set(urls)
+        for url in list(self.state):
+            if url not in urls:
+                del self.state[url]
+        for url in urls:
+            if url not in self.state:
+                self.state[url] = {
+                    'interval': DEFAULT_INTERVAL,
+                    'next_poll': now,
+                    'failures': 0,
+                    'newest': None,
+                }
+        self.heap = [(entry['next_poll'], url) for url, entry in self.state.items()]
+        heapq.heapify(self.heap)
+
+    def next_due(self):
+        """Timestamp of the earliest scheduled poll, or None"""
+        return self.heap[0][0] if self.heap else None
+
+    def pop_due(self, now=None):
+        """Remove and return every URL whose poll time has come"""
+        now = now or time.time()
+        due = []
+        while self.heap and self.heap[0][0] <= now:
+            _, url = heapq.heappop(self.heap)
+            if url in self.state:
+                due.append(url)
+        return due
+
+    def newest(self, url):
+        """Newest item timestamp seen for a feed"""
+        return self.state.get(url, {}).get('newest')
+
+    def _schedule(self, url, delay, now):
+        entry = self.state[url]
+        entry['next_poll'] = now + delay
+        heapq.heappush(self.heap, (entry['next_poll'], url))
+
+    def success(self, url, timestamps, meta, headers, now=None):
+        """Reschedule after a good poll; timestamps are the item dates that were read"""
+        now = now or time.time()
+        entry = self.state.get(url)
+        if entry is None:
+            return
+        entry['failures'] = 0
+
+        interval = learned_interval(timestamps) or entry['interval']
+        hint = hinted_interval(meta, headers)
+        if hint:
+            interval = max(interval, hint)
+        entry['interval'] = min(self.max_interval, max(self.min_interval, interval))
+        if timestamps:
+            newest = max(timestamps)
+            if entry['newest'] is None or newest > entry['newest']:
+                entry['newest'] = newest
+        self._schedule(url, entry['interval'], now)
+
+    def failure(self, url, headers=None, now=None):
+        """Reschedule after an error with exponential backoff"""
+        now = now or time.time()
+        entry = self.state.get(url)
+        if entry is None:
+            return
+        entry['failures'] += 1
+        delay = min(MAX_BACKOFF, entry['interval'] * 2 ** (entry['failures'] - 1))
+        wait = retry_after(headers or {}, now)
+        if wait is not None:
+            delay = max(delay, wait)
+        self._schedule(url, delay, now)
+
+    def save(self):
+        tmp = f"{self.path}.{os.getpid()}.tmp"
+        with open(tmp, 'w', encoding='utf-8') as f:
+            json.dump(self.state, f)
+        os.replace(tmp, self.path)
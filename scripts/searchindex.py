@@ -0,0 +1,182 @@
+"""
+RSS Agent search index - SQLite FTS5 over every item digest, fetch and daemon have read
+"""
+
+import re
+import sqlite3
+import time
+
+from htmltext import html_to_text
+
+# Text kept per document; full articles beyond this are rarely what a query hits
+SUMMARY_CHARS = 2000
+BODY_CHARS = 100000
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS docs (
+    doc INTEGER PRIMARY KEY,
+    id TEXT NOT NULL UNIQUE,
+    feed_url TEXT NOT NULL,
+    feed_name TEXT,
+    category TEXT,
+    title TEXT,
+    link TEXT,
+    published REAL NOT NULL,
+    summary TEXT,
+    body TEXT
+);
+CREATE INDEX IF NOT EXISTS docs_published ON docs (published);
+CREATE VIRTUAL TABLE IF NOT EXISTS docs_fts USING fts5(
+    title, summary, body,
+    content='docs', content_rowid='doc',
+    tokenize='unicode61 remove_diacritics 2'
+);
+CREATE TRIGGER IF NOT EXISTS docs_ai AFTER INSERT ON docs BEGIN
+    INSERT INTO docs_fts (rowid, title, summary, body)
+    VALUES (new.doc, new.title, new.summary, new.body);
+END;
+CREATE TRIGGER IF NOT EXISTS docs_ad AFTER DELETE ON docs BEGIN
+    INSERT INTO docs_fts (docs_fts, rowid, title, summary, body)
+    VALUES ('delete', old.doc, old.title, old.summary, old.body);
+END;
+CREATE TRIGGER IF NOT EXISTS docs_au AFTER UPDATE ON docs BEGIN
+    INSERT INTO docs_fts (docs_fts, rowid, title, summary, body)
+    VALUES ('delete', old.doc, old.title, old.summary, old.body);
+    INSERT INTO docs_fts (rowid, title, summary, body)
+    VALUES (new.doc, new.title, new.summary, new.body);
+END;
+"""
+
+# bm25 column weights: a hit in the title outranks one in the summary or body
+RANK = "bm25(docs_fts, 10.0, 3.0, 1.0)"
+
+SNIPPET_CHARS = 160
+QUERY_OPERATORS = {'AND', 'OR', 'NOT', 'NEAR'}
+
+
+def quote_query(query):
+    """Every word of a free-text query as a quoted FTS5 string (implicit AND)"""
+    return ' '.join('"' + word.replace('"', '""') + '"' for word in query.split())
+
+
+def make_snippet(query, texts, width=SNIPPET_CHARS):
+    """A window of the first text that mentions a query word, with the words in **bold**.
+
+    FTS5's snippet() scores every hit in the document, which takes seconds
+    on a long article full of matches; this stops at the first one.
+    """
+    words = [w for w in re.findall(r'\w+', query) if w not in QUERY_OPERATORS]
+    if not words:
+        return None
+    pattern = re.compile(r'\b(?:' + '|'.join(re.escape(w) for w in words) + r')\w*', re.IGNORECASE)
+    for text in texts:
+        if not text:
+            continue
+        match = pattern.search(text)
+        if match is None:
+            continue
+        start = max(0, match.start() - width // 3)
+        window = ' '.join(text[start:start + width].split())
+        window = pattern.sub(lambda m: f"**{m.group(0)}**", window)
+        return ('…' if start > 0 else '') + window + ('…' if start + width < len(text) else '')
+    return None
+
+
+class SearchIndex:
+    """Full-text index of feed items, stored in the item database.
+
+    Items are added incrementally: ones already indexed are skipped (only
+    their missing article body is filled in), so re-reading the same feeds
+    costs one lookup per batch. HTML is converted to text only for what is
+    actually written.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self.conn = sqlite3.connect(path, timeout=30)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        # digest commits once per feed; in WAL mode NORMAL only defers the fsync to checkpoints
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        self.conn.executescript(SCHEMA)
+
+    def add(self, items):
+        """Index item dicts (id, feed_url, feed_name, category, title, link,
+        date, and optional summary / content HTML); returns how many were new"""
+        if not items:
+            return 0
+        has_body = {}
+        ids = [item['id'] for item in items]
+        for i in range(0, len(ids), 500):
+            chunk = ids[i:i + 500]
+            marks = ','.join('?' * len(chunk))
+            rows = self.conn.execute(
+                f"SELECT id, body IS NOT NULL FROM docs WHERE id IN ({marks})", chunk)
+            has_body.update(rows)
+
+        now = time.time()
+        new, bodies = [], []
+        for item in items:
+            known = has_body.get(item['id'])
+            if known is None:
+                has_body[item['id']] = bool(item.get('content'))
+                new.append((
+                    item['id'], item['feed_url'], item.get('feed_name'), item.get('category'),
+                    item.get('title'), item.get('link'),
+                    # Undated items are filed under the time they were first indexed
+                    now if item.get('date') is None else item['date'],
+                    html_to_text(item['summary'], SUMMARY_CHARS)[0] if item.get('summary') else None,
+                    html_to_text(item['content'], BODY_CHARS)[0] if item.get('content') else None,
+                ))
+            elif not known and item.get('content'):
+                has_body[item['id']] = True
+                bodies.append((html_to_text(item['content'], BODY_CHARS)[0], item['id']))
+
+        with self.conn:
+            self.conn.executemany(
+                "INSERT OR IGNORE INTO docs (id, feed_url, feed_name, category, title, link, "
+                "published, summary, body) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)", new)
+            self.conn.executemany("UPDATE docs SET body = ? WHERE id = ?", bodies)
+        return len(new)
+
+    def search(self, query, category=None, feed=None, since=None, until=None, limit=20):
+        """Best matches first, as dicts with a highlighted `snippet`.
+
+        `feed` matches a feed name or URL; `since`/`until` are POSIX
+        timestamps. The query is FTS5 syntax (AND/OR/NOT, "phrases",
+        prefix*), and falls back to plain words if it does not parse.
+        """
+        where = ["docs_fts MATCH ?"]
+        params = []
+        if category:
+            where.append("d.category = ?")
+            params.append(category)
+        if feed:
+            where.append("(d.feed_name = ? OR d.feed_url = ?)")
+            params += [feed, feed]
+        if since is not None:
+            where.append("d.published >= ?")
+            params.append(since)
+        if until is not None:
+            where.append("d.published < ?")
+            params.append(until)
+        sql = (
+            "SELECT d.id, d.title, d.link, d.published, d.feed_name, d.feed_url, d.category, "
+            f"d.summary, d.body, {RANK} "
+            "FROM docs_fts JOIN docs d ON d.doc = docs_fts.rowid "
+            f"WHERE {' AND '.join(where)} ORDER BY {RANK} LIMIT ?"
+        )
+        try:
+            rows = self.conn.execute(sql, [query] + params + [limit]).fetchall()
+        except sqlite3.OperationalError:
+            rows = self.conn.execute(sql, [quote_query(query)] + params + [limit]).fetchall()
+
+        keys = ('id', 'title', 'link', 'date', 'feed_name', 'feed_url', 'category')
+        # bm25 is lower-is-better; report it the other way round
+        return [dict(zip(keys, row), snippet=make_snippet(query, row[7:9]), score=round(-row[9], 3))
+                for row in rows]
+
+    def count(self):
+        return self.conn.execute("SELECT count(*) FROM docs").fetchone()[0]
+
+    def close(self):
+        self.conn.close()
@@ -0,0 +1,83 @@
+"""
+RSS Agent digest shards - consistent-hash partitioning of feeds and the partial files of a sharded digest
+"""
+
+import bisect
+import hashlib
+import json
+import os
+
+# Points per shard on the hash ring; more points even out the shard sizes
+VNODES = 256
+
+
+def parse_shard(text):
+    """`i/N` (1 <= i <= N) as (i, N), for argparse"""
+    import argparse
+
+    index, _, count = text.partition('/')
+    try:
+        index, count = int(index), int(count)
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"expected i/N, e.g. 1/4, not {text!r}")
+    if not 1 <= index <= count:
+        raise argparse.ArgumentTypeError(f"shard {index} of {count} is out of range (1..{count})")
+    return index, count
+
+
+def _point(text):
+    return int.from_bytes(hashlib.blake2b(text.encode('utf-8'), digest_size=8).digest(), 'big')
+
+
+class ShardRing:
+    """Consistent-hash ring over `count` shards, numbered 1..count.
+
+    A key belongs to the shard owning the first ring point at or after its
+    hash. Every node computes the same assignment from the key alone, and
+    going from N to N+1 shards moves only about 1/(N+1) of the keys.
+    """
+
+    def __init__(self, count, vnodes=VNODES):
+        points = sorted((_point(f"shard {shard} #{vnode}"), shard)
+                        for shard in range(1, count + 1) for vnode in range(vnodes))
+        self.points = [point for point, _ in points]
+        self.shards = [shard for _, shard in points]
+
+    def shard(self, key):
+        return self.shards[bisect.bisect_left(self.points, _point(key)) % len(self.points)]
+
+
+def write_partial(path, header, records):
+    """Write a shard's partial file: the header, then item records (newest first), one per line.
+
+    The file appears at `path` only once complete.
+    """
+    tmp = f"{path}.{os.getpid()}.tmp"
+    try:
+        with open(tmp, 'w', encoding='utf-8') as f:
+            f.write(json.dumps({'type': 'partial', **header}, ensure_ascii=False) + '\n')
+            for record in records:
+                f.write(json.dumps(record, ensure_ascii=False) + '\n')
+        os.replace(tmp, path)
+    finally:
+        if os.path.exists(tmp):
+            os.remove(tmp)
+
+
+def read_partial(path):
+    """(header, item records) of a partial file; the records are read lazily, one line at a time"""
+    f = open(path, 'r', encoding='utf-8')
+    try:
+        header = json.loads(f.readline() or 'null')
+    except ValueError:
+        header = None
+    if not isinstance(header, dict) or header.get('type') != 'partial':
+        f.close()
+        raise ValueError(f"{path} is not a digest partial file")
+
+    def records():
+        with f:
+            for line in f:
+                if line.strip():
+                    yield json.loads(line)
+    return header, records()
@@ -0,0 +1,118 @@
+"""
+RSS Agent subscription store - indexed view over rss_feeds.json with atomic writes
+"""
+
+import json
+import os
+from contextlib import contextmanager
+
+from locking import file_lock
+
+
+class FeedStore:
+    """Subscription list keyed by xmlUrl, with a name index and category grouping.
+
+    The on-disk format is the plain JSON list documented in SKILL.md, so
+    files stay hand-editable and import/export keep working unchanged.
+
+    Reading is lock-free. Writers go through FeedStore.update(), which is
+    read-copy-update: take the lock, re-read the current file, modify the
+    copy, and publish it by atomic rename.
+    """
+
+    @classmethod
+    @contextmanager
+    def update(cls, path):
+        """Exclusive read-modify-write of the subscription file; saves on success"""
+        with file_lock(path):
+            store = cls(path)
+            yield store
+            if store.dirty:
+                store.save()
+
+    def __init__(self, path):
+        self.path = path
+        self._by_url = {}
+        self._by_name = {}
+        if os.path.exists(path):
+            with open(path, 'r', encoding='utf-8') as f:
+                for feed in json.load(f):
+                    self._insert(feed)
+        self.dirty = False
+
+    def _insert(self, feed):
+        url = feed.get('xmlUrl') or ''
+        if url in self._by_url:
+            return False
+        self._by_url[url] = feed
+        self._by_name.setdefault(feed.get('name'), []).append(url)
+        return True
+
+    def __iter__(self):
+        return iter(self._by_url.values())
+
+    def __len__(self):
+        return len(self._by_url)
+
+    def feeds(self):
+        """All subscriptions in file order"""
+        return list(self._by_url.values())
+
+    def find(self, identifier):
+        """Feeds whose URL or name equals identifier"""
+        if identifier in self._by_url:
+            return [self._by_url[identifier]]
+        return [self._by_url[url] for url in self._by_name.get(identifier, [])]
+
+    def get(self, identifier):
+        """First feed matching a URL or name, or None"""
+        found = self.find(identifier)
+        return found[0] if found else None
+
+    def get_url(self, url):
+        return self._by_url.get(url)
+
+    def add(self, feed):
+        """Add a feed; False if its URL is already subscribed"""
+        added = self._insert(feed)
+        self.dirty = self.dirty or added
+        return added
+
+    def remove(self, identifier):
+        """Remove feeds matching a URL or name and return them"""
+        removed = self.find(identifier)
+        for feed in removed:
+            url = feed.get('xmlUrl') or ''
+            del self._by_url[url]
+            urls = self._by_name.get(feed.get('name'), [])
+            if url in urls:
+                urls.remove(url)
+            if not urls:
+                self._by_name.pop(feed.get('name'), None)
+        self.dirty = self.dirty or bool(removed)
+        return removed
+
+    def by_category(self, category=None):
+        """Feeds grouped by category, optionally for a single category"""
+        groups = {}
+        for feed in self._by_url.values():
+            cat = feed.get('category') or 'Uncategorized'
+            if category is None or cat == category:
+                groups.setdefault(cat, []).append(feed)
+        return groups
+
+    def save(self):
+        """Write the list atomically: temp file in the same directory, then rename"""
+        directory = os.path.dirname(self.path) or '.'
+        os.makedirs(directory, exist_ok=True)
+        tmp = f"{self.path}.{os.getpid()}.tmp"
+        try:
+            with open(tmp, 'w', encoding='utf-8') as f:
+                json.dump(self.feeds(), f, ensure_ascii=False, indent=2)
+                f.flush()
+                os.fsync(f.fileno())
+            os.replace(tmp, self.path)
+            self.dirty = False
+        finally:
+            if os.path.exists(tmp):
+                os.remove(tmp)
@@ -0,0 +1,46 @@
+"""
+RSS Agent top-K aggregation - newest items per category without keeping the rest
+"""
+
+import heapq
+
+
+class CategoryTopK:
+    """Bounded per-category selection for digest.
+
+    Keeps a min-heap of at most `k` items per category, plus a count of every
+    item offered, so memory is O(categories * k) however many items pass
+    through. Equal keys keep the item offered first, which matches a stable
+    sort over the items in arrival order.
+    """
+
+    def __init__(self, k, key):
+        self.k = k
+        self.key = key
+        self.heaps = {}
+        self.counts = {}
+        self.total = 0
+        self._seq = 0
+
+    def add(self, item):
+        category = item.get('category') or 'Uncategorized'
+        self.counts[category] = self.counts.get(category, 0) + 1
+        self.total += 1
+        if self.k <= 0:
+            return
+
+        self._seq += 1
+        # The heap root is the entry to evict: oldest key, then latest arrival
+        entry = (self.key(item), -self._seq, item)
+        heap = self.heaps.setdefault(category, [])
+        if len(heap) < self.k:
+            heapq.heappush(heap, entry)
+        elif entry[:2] > heap[0][:2]:
+            heapq.heapreplace(heap, entry)
+
+    def categories(self):
+        """(category, total count, newest items first) in category name order"""
+        for category in sorted(self.counts):
+            heap = self.heaps.get(category, [])
+            items = [entry[2] for entry in sorted(heap, key=lambda e: e[:2], reverse=True)]
+            yield category, self.counts[category], items